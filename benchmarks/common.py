@@ -0,0 +1,32 @@
+import os
+import sys
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Settings the app refuses to start without. Benchmarks never talk to a real
+# mail server, so placeholders are enough unless the caller overrides them.
+BENCH_ENVIRONMENT = {
+    "JWT_SECRET": "benchmark-secret",
+    "JWT_ALOGRITHM": "HS256",
+    "MAIL_USERNAME": "benchmark",
+    "MAIL_PASSWORD": "benchmark",
+    "MAIL_FROM": "benchmark@example.com",
+    "MAIL_PORT": "1025",
+    "MAIL_SERVER": "localhost",
+    "MAIL_FROM_NAME": "Benchmark",
+    # Benchmark databases start empty, so build the schema at startup.
+    "DB_AUTO_MIGRATE": "true",
+    # Every in-process request comes from the same client address.
+    "RATE_LIMIT_ENABLED": "false",
+}
+
+
+def configure_environment(database_url: str, **overrides):
+    """Must run before anything under ``src`` is imported."""
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    os.environ["DATABASE_URL"] = database_url
+    for key, value in {**BENCH_ENVIRONMENT, **overrides}.items():
+        os.environ.setdefault(key, str(value))
@@ -0,0 +1,62 @@
+"""
+Throughput benchmark for the thumbnail/WebP derivative pipeline.
+
+Renders every variant of a synthetic camera-sized JPEG on a process pool of
+increasing size and reports images per second, per-worker throughput and how
+many bytes each variant saves against the original.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.image_derivatives_bench --images 40 --width 4000 --height 3000
+"""
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.common import configure_environment
+
+
+def synthetic_photo(width, height):
+    from PIL import Image
+
+    # Gradient plus noise so the encoder cannot cheat on a flat image.
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 48)
+    image = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+    output = io.BytesIO()
+    image.save(output, "JPEG", quality=90)
+    return output.getvalue()
+
+
+def main(args):
+    from src.images import render_variants
+
+    original = synthetic_photo(args.width, args.height)
+    sizes = {name: len(body) for name, (body, _) in render_variants(original).items()}
+    print(f"original {args.width}x{args.height} jpeg: {len(original) / 1024:.0f} KiB")
+    for name, size in sorted(sizes.items()):
+        print(f"  {name:<12} {size / 1024:>7.1f} KiB  ({size / len(original):.1%} of original)")
+
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    for workers in worker_counts:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Warm the pool so process start-up is not in the measurement.
+            list(executor.map(render_variants, [original] * workers))
+            started = time.perf_counter()
+            list(executor.map(render_variants, [original] * args.images))
+            elapsed = time.perf_counter() - started
+        rate = args.images / elapsed
+        print(f"workers={workers:<3} images={args.images} wall={elapsed:.2f}s "
+              f"images_per_sec={rate:.1f} per_worker={rate / workers:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    args = parser.parse_args()
+
+    configure_environment("sqlite+aiosqlite://")
+    main(args)
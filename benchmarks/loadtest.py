@@ -0,0 +1,331 @@
+"""
+Reproducible load test for the main API flows.
+
+Seeds a fresh database with users, blogs, reactions and comments, then drives
+the real app in-process through httpx's ASGI transport at a fixed concurrency.
+Signup, login, feed, like, comment and profile update run one after another;
+each reports p50/p95/p99 latency and throughput. Media goes to local storage
+in a temporary directory and outgoing mail is swallowed, so no S3 bucket or
+SMTP server is needed. Results are written as JSON; pass an earlier file as
+--baseline to see the change per scenario.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.loadtest --users 1000 --blogs 2000 --concurrency 32 --output head.json
+    python -m benchmarks.loadtest --baseline head.json --output branch.json
+
+The default database is a new SQLite file per run. For numbers that resemble
+production, point --database-url at an empty PostgreSQL database.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.common import REPO_ROOT, configure_environment
+
+
+SCENARIOS = ("signup", "login", "feed", "like", "comment", "profile_update")
+PASSWORD = "Benchmark@123"
+
+
+class NullSMTP:
+    """Stands in for the aiosmtplib client; every message is accepted and dropped."""
+
+    is_connected = True
+
+    async def send_message(self, message):
+        pass
+
+    def close(self):
+        pass
+
+
+async def null_connect():
+    return NullSMTP()
+
+
+def letters(number: int) -> str:
+    # Usernames may only contain letters and spaces.
+    name = ""
+    while True:
+        number, digit = divmod(number, 26)
+        name = chr(ord("a") + digit) + name
+        if number == 0:
+            return name
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def git_revision() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(status) if status is not None else None}
+
+
+async def seed(session_factory, args, rng):
+    from src.db.models import BlogCreate, BlogReaction, Comment, usertable
+    from src.utils import password_hasher
+
+    # One hash for every seeded account; bcrypt would otherwise dominate seeding.
+    password = await password_hasher.hash(PASSWORD)
+
+    async with session_factory() as session:
+        users = [
+            usertable(username=f"seed {letters(i)}", email=f"seed{i}@example.com", password=password)
+            for i in range(args.users)
+        ]
+        session.add_all(users)
+        await session.flush()
+
+        blogs = [
+            BlogCreate(
+                user_id=rng.choice(users).user_id,
+                description=f"load test post {i} " + "word " * 60
+            )
+            for i in range(args.blogs)
+        ]
+        session.add_all(blogs)
+        await session.flush()
+
+        pairs = rng.sample(range(args.users * args.blogs), min(args.reactions, args.users * args.blogs))
+        for pair in pairs:
+            user, blog = users[pair // args.blogs], blogs[pair % args.blogs]
+            kind = "like" if rng.random() < 0.8 else "dislike"
+            session.add(BlogReaction(blog_uid=blog.blog_uid, user_id=user.user_id, kind=kind))
+            if kind == "like":
+                blog.like_count += 1
+            else:
+                blog.dislike_count += 1
+
+        for i in range(args.comments):
+            user, blog = rng.choice(users), rng.choice(blogs)
+            session.add(Comment(
+                blog_uid=blog.blog_uid,
+                user_id=user.user_id,
+                username=user.username,
+                user_photo=user.image,
+                comment=f"seeded comment {i}"
+            ))
+            blog.comment_count += 1
+
+        await session.commit()
+        return (
+            [(str(user.user_id), user.username, user.email) for user in users],
+            [str(blog.blog_uid) for blog in blogs],
+        )
+
+
+def build_requests(users, blogs, run_id):
+    """Returns scenario -> function(i, rng) giving (method, url, request options)."""
+    prefix = letters(int(run_id, 16))
+
+    def signup(i, rng):
+        return "POST", "/auth/signup", {"json": {
+            "username": f"load {prefix} {letters(i)}",
+            "email": f"load-{run_id}-{i}@example.com",
+            "password": PASSWORD,
+            "confirm_password": PASSWORD,
+        }}
+
+    def login(i, rng):
+        _, _, email = rng.choice(users)
+        return "POST", "/auth/login", {"json": {"email": email, "password": PASSWORD}}
+
+    def feed(i, rng):
+        user_id, _, _ = rng.choice(users)
+        return "GET", "/auth/bloge_list", {"params": {"user_id": user_id}}
+
+    def like(i, rng):
+        user_id, _, _ = rng.choice(users)
+        return "POST", f"/auth/like/{user_id}/{rng.choice(blogs)}", {}
+
+    def comment(i, rng):
+        user_id, _, _ = rng.choice(users)
+        return "POST", f"/auth/comment/{user_id}/{rng.choice(blogs)}", {"json": {"comments": f"load comment {i}"}}
+
+    def profile_update(i, rng):
+        user_id, username, email = rng.choice(users)
+        return "PUT", f"/auth/profile_create/{user_id}", {"data": {"username": username, "email": email}}
+
+    return {
+        "signup": signup,
+        "login": login,
+        "feed": feed,
+        "like": like,
+        "comment": comment,
+        "profile_update": profile_update,
+    }
+
+
+async def run_scenario(client, build, requests, concurrency, rng, offset=0):
+    latencies = []
+    statuses = {}
+    counter = iter(range(offset, offset + requests))
+
+    async def worker():
+        for i in counter:
+            method, url, options = build(i, rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **options)
+                code = response.status_code
+            except Exception:
+                code = "exception"
+            latencies.append(time.perf_counter() - started)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(count for code, count in statuses.items() if code == "exception" or code >= 400)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items(), key=str)},
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(latencies, 0.99) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        },
+    }
+
+
+def print_results(results: dict, baseline: dict = None):
+    print(f"{'scenario':<16}{'requests':>9}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, result in results["scenarios"].items():
+        latency = result["latency_ms"]
+        print(
+            f"{name:<16}{result['requests']:>9}{result['errors']:>8}{result['throughput_rps']:>10.1f}"
+            f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}"
+        )
+
+    if not baseline:
+        return
+    print(f"\nchange against {baseline.get('git', {}).get('commit') or 'baseline'}")
+    for name, result in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        changes = []
+        for label, old, new in (
+            ("rps", before["throughput_rps"], result["throughput_rps"]),
+            ("p50", before["latency_ms"]["p50"], result["latency_ms"]["p50"]),
+            ("p95", before["latency_ms"]["p95"], result["latency_ms"]["p95"]),
+            ("p99", before["latency_ms"]["p99"], result["latency_ms"]["p99"]),
+        ):
+            changes.append(f"{label} {(new - old) / old * 100:+.1f}%" if old else f"{label} n/a")
+        print(f"{name:<16}" + "  ".join(changes))
+
+
+async def main(args):
+    import httpx
+    from src.main import app
+    from src.db.database import engine, async_session
+    from src.mail import mail_queue
+
+    mail_queue._connect = null_connect
+    rng = random.Random(args.seed)
+    run_id = uuid.UUID(int=rng.getrandbits(128)).hex[:8]
+    scenarios = args.scenarios or list(SCENARIOS)
+
+    try:
+        async with app.router.lifespan_context(app):
+            started = time.perf_counter()
+            users, blogs = await seed(async_session, args, rng)
+            seed_seconds = time.perf_counter() - started
+            print(
+                f"seeded users={args.users} blogs={args.blogs} reactions={args.reactions} "
+                f"comments={args.comments} in {seed_seconds:.1f}s"
+            )
+
+            builders = build_requests(users, blogs, run_id)
+            results = {
+                "git": git_revision(),
+                "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "database": engine.url.get_backend_name(),
+                "config": {
+                    "users": args.users,
+                    "blogs": args.blogs,
+                    "reactions": args.reactions,
+                    "comments": args.comments,
+                    "requests": args.requests,
+                    "warmup": args.warmup,
+                    "concurrency": args.concurrency,
+                    "seed": args.seed,
+                },
+                "seed_seconds": round(seed_seconds, 3),
+                "scenarios": {},
+            }
+
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+                for name in scenarios:
+                    build = builders[name]
+                    if args.warmup:
+                        await run_scenario(client, build, args.warmup, args.concurrency, rng)
+                    results["scenarios"][name] = await run_scenario(
+                        client, build, args.requests, args.concurrency, rng, offset=args.warmup
+                    )
+    finally:
+        await engine.dispose()
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    print_results(results, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--blogs", type=int, default=500)
+    parser.add_argument("--reactions", type=int, default=2000)
+    parser.add_argument("--comments", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS)
+    parser.add_argument("--database-url", help="defaults to a new SQLite file")
+    parser.add_argument("--bcrypt-rounds", type=int, help="defaults to the app's BCRYPT_ROUNDS")
+    parser.add_argument("--output", default="loadtest-results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="mindmingle-loadtest-"))
+    overrides = {
+        "STORAGE_BACKEND": "local",
+        "UPLOAD_DIR": workdir / "uploads",
+        "PROFILE_DIR": workdir / "profiles",
+    }
+    if args.bcrypt_rounds:
+        overrides["BCRYPT_ROUNDS"] = args.bcrypt_rounds
+    configure_environment(args.database_url or f"sqlite+aiosqlite:///{workdir / 'loadtest.db'}", **overrides)
+    asyncio.run(main(args))
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark for the per-request cost of MetricsMiddleware.
+
+Drives a minimal ASGI app directly (no HTTP server, no FastAPI routing) with
+and without the middleware around it, so the difference is the middleware
+alone: timing, the send wrapper and the histogram updates.
+
+    python -m benchmarks.metrics_overhead_bench --requests 200000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_environment
+
+
+class FakeRoute:
+    path = "/auth/bloge_details/{BlogeID}"
+
+
+async def endpoint(scope, receive, send):
+    # What the router does: note the matched route, then answer.
+    scope["route"] = FakeRoute
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", b"2")],
+    })
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/auth/bloge_details/1"}, receive, send)
+    return time.perf_counter() - started
+
+
+async def main(args):
+    from src.metrics import MetricsMiddleware, MetricsRegistry
+
+    registry = MetricsRegistry()
+    instrumented = MetricsMiddleware(endpoint, registry)
+
+    # Warm up both paths before measuring.
+    await run(endpoint, 10000)
+    await run(instrumented, 10000)
+
+    bare = min([await run(endpoint, args.requests) for _ in range(args.rounds)])
+    timed = min([await run(instrumented, args.requests) for _ in range(args.rounds)])
+    overhead_us = (timed - bare) / args.requests * 1e6
+
+    started = time.perf_counter()
+    page = registry.render()
+    render_ms = (time.perf_counter() - started) * 1000
+
+    print(f"requests={args.requests} rounds={args.rounds} (best round)")
+    print(f"bare          {bare / args.requests * 1e6:.2f}us/request")
+    print(f"instrumented  {timed / args.requests * 1e6:.2f}us/request")
+    print(f"overhead      {overhead_us:.2f}us/request")
+    print(f"/metrics render {render_ms:.2f}ms for {len(page.splitlines())} lines")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    configure_environment("sqlite+aiosqlite://")
+    asyncio.run(main(args))
@@ -0,0 +1,98 @@
+"""
+Micro-benchmark for the per-request cost of RateLimitMiddleware.
+
+Drives a minimal ASGI app directly with and without the middleware, for a
+path no limit applies to, for a limited path keyed by client IP only, and
+for one that also carries a bearer token so the per-user bucket is used.
+Requests cycle through --clients addresses so the sharded bucket maps hold
+that many live keys.
+
+    python -m benchmarks.ratelimit_bench --requests 200000 --clients 10000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_environment
+
+
+async def endpoint(scope, receive, send):
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", b"2")],
+    })
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+def build_scopes(path, clients, headers):
+    return [
+        {
+            "type": "http",
+            "method": "POST",
+            "path": path,
+            "client": (f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", 40000),
+            "headers": headers,
+        }
+        for i in range(clients)
+    ]
+
+
+async def run(app, scopes, requests):
+    count = len(scopes)
+    started = time.perf_counter()
+    for i in range(requests):
+        await app(scopes[i % count], receive, send)
+    return time.perf_counter() - started
+
+
+async def main(args):
+    from src.ratelimit import Limit, RateLimiter, RateLimitMiddleware, TokenBuckets
+    from src.utils import create_access_token
+
+    # Generous enough that nothing is rejected, so every request does the full check.
+    limit = Limit("bench", f"{args.requests}/1")
+    limiter = RateLimiter(
+        [("POST", "/auth/like/", limit)],
+        TokenBuckets(shards=args.shards, sweep_interval=60)
+    )
+    limited = RateLimitMiddleware(endpoint, limiter)
+
+    token = create_access_token(user_data={"email": "bench@example.com", "user_id": "bench-user", "user_role": "user"})
+    cases = [
+        ("unlimited path", build_scopes("/auth/bloge_list", args.clients, [])),
+        ("ip bucket", build_scopes("/auth/like/u/b", args.clients, [])),
+        ("ip + user bucket", build_scopes("/auth/like/u/b", args.clients, [(b"authorization", f"Bearer {token}".encode())])),
+    ]
+
+    print(f"requests={args.requests} clients={args.clients} shards={args.shards} (best of {args.rounds})")
+    for name, scopes in cases:
+        await run(endpoint, scopes, 10000)
+        await run(limited, scopes, 10000)
+        bare = min([await run(endpoint, scopes, args.requests) for _ in range(args.rounds)])
+        timed = min([await run(limited, scopes, args.requests) for _ in range(args.rounds)])
+        print(
+            f"{name:<18} bare {bare / args.requests * 1e6:.2f}us  limited {timed / args.requests * 1e6:.2f}us  "
+            f"overhead {(timed - bare) / args.requests * 1e6:.2f}us/request"
+        )
+    print(f"live buckets {len(limiter.buckets)}, rejected {limiter.limited}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--shards", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    configure_environment("sqlite+aiosqlite://")
+    asyncio.run(main(args))
@@ -0,0 +1,82 @@
+"""
+Burst benchmark for request coalescing on the hot read endpoints.
+
+Fires N concurrent GET /auth/bloge_list and /auth/fetch_blog_details_for_editing
+requests at the in-process app, with single-flight off and then on, and counts
+the SQL statements each burst sends to the database.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.singleflight_bench --requests 500
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_environment
+
+
+async def seed(session_factory):
+    from src.db.models import BlogCreate, usertable
+
+    async with session_factory() as session:
+        user = usertable(username="benchmark", email="benchmark@example.com", password="")
+        session.add(user)
+        await session.flush()
+        blogs = [
+            BlogCreate(user_id=user.user_id, description=f"benchmark post {i}")
+            for i in range(50)
+        ]
+        session.add_all(blogs)
+        await session.commit()
+        return blogs[0].blog_uid
+
+
+async def burst(client, path, requests, statements):
+    before = statements[0]
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(client.get(path) for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    assert all(response.status_code == 200 for response in responses)
+    return statements[0] - before, elapsed
+
+
+async def main(args):
+    import httpx
+    from sqlalchemy import event
+    from src.main import app
+    from src.db.database import engine, async_session
+    from src.cache import feed_cache, read_flight
+
+    statements = [0]
+
+    def count_statement(*_):
+        statements[0] += 1
+
+    async with app.router.lifespan_context(app):
+        blog_uid = await seed(async_session)
+        event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            paths = ["/auth/bloge_list", f"/auth/fetch_blog_details_for_editing/{blog_uid}"]
+            for path in paths:
+                for enabled in (False, True):
+                    read_flight.enabled = enabled
+                    feed_cache.clear()
+                    queries, elapsed = await burst(client, path, args.requests, statements)
+                    print(
+                        f"{path.split('/')[2]:<32} single_flight={'on ' if enabled else 'off'} "
+                        f"requests={args.requests} sql_statements={queries:<5} wall={elapsed * 1000:.1f}ms"
+                    )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--database-url", default="sqlite+aiosqlite://")
+    args = parser.parse_args()
+
+    configure_environment(args.database_url)
+    asyncio.run(main(args))
@@ -0,0 +1,45 @@
+from typing import Optional
+from fastapi import HTTPException, status
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import IntegrityError
+from src.db.models import usertable
+
+
+# Unique indexes on usertable whose violations are the user's doing, and the
+# 403 detail each one maps to.
+UNIQUE_USER_INDEXES = {
+    "ux_usertable_email_lower": "Email already exists",
+    "ux_usertable_username_lower": "Username already exists",
+}
+
+
+async def signup_conflict(email: str, username: str, session) -> Optional[str]:
+    """
+    One round-trip for both uniqueness checks, answered from the
+    lower(email) and lower(username) unique indexes. Expects both lowercased;
+    returns the 403 detail, or None when both are free.
+    """
+    result = await session.execute(
+        select(usertable.email).where(
+            or_(func.lower(usertable.email) == email, func.lower(usertable.username) == username)
+        ).limit(2)
+    )
+    emails = result.scalars().all()
+    if any(existing_email.lower() == email for existing_email in emails):
+        return UNIQUE_USER_INDEXES["ux_usertable_email_lower"]
+    if emails:
+        return UNIQUE_USER_INDEXES["ux_usertable_username_lower"]
+    return None
+
+
+def raise_unique_violation(e: IntegrityError):
+    """
+    Turns a duplicate email or username on usertable, typically a concurrent
+    signup or rename that passed the pre-check, into a 403. Any other
+    integrity error is re-raised unchanged.
+    """
+    message = str(e.orig)
+    for index, detail in UNIQUE_USER_INDEXES.items():
+        if index in message:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail) from e
+    raise e
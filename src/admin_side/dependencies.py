@@ -2,8 +2,10 @@ from fastapi.security import HTTPBearer
 from fastapi import Request, status
 from fastapi.security.http import HTTPAuthorizationCredentials
 from src.utils import decode_token
+from src.config import Config
 from fastapi.exceptions import HTTPException
 from typing import Optional
+import hmac
 import jwt
 
 
@@ -18,7 +20,7 @@ class TokenBearer(HTTPBearer):
         
         token_data = decode_token(token)
 
-        if not self.token_valid(token):
+        if token_data is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or  expired token"
@@ -29,10 +31,6 @@ class TokenBearer(HTTPBearer):
 
         return token_data
 
-    def token_valid(self, token: str):
-        token_data = decode_token(token)
-        return True if token_data is not None else False
-    
     def verify_token_data(self, token_data):
         raise NotImplementedError("Please Override this method in child classes")
     
@@ -63,4 +61,15 @@ class RefreshTokenBearer(TokenBearer):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Please provide an refresh token"
-            )
\ No newline at end of file
+            )
+
+
+class MetricsTokenBearer(AccessTokenBearer):
+    """Admin access tokens, or the static METRICS_TOKEN for a Prometheus scraper."""
+
+    async def __call__(self, request: Request):
+        if Config.METRICS_TOKEN:
+            creds = await HTTPBearer.__call__(self, request)
+            if hmac.compare_digest(creds.credentials.encode(), Config.METRICS_TOKEN.encode()):
+                return {}
+        return await super().__call__(request)
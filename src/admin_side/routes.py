@@ -1,10 +1,13 @@
 from fastapi import APIRouter,Depends,Form
-from src.db.database import get_session
+from src.db.database import get_session, pool_stats
 from fastapi.responses import JSONResponse
 from .service import *
 from .dependencies import *
-from fastapi_mail import FastMail, MessageSchema
-from src.mail import mail_config
+from src.cache import feed_cache, read_flight
+from src.profiling import capture_store
+from src.accounts import signup_conflict
+from src.presence import presence_tracker
+from fastapi.responses import FileResponse
 from src.utils import *
 from sqlalchemy import and_
 from sqlalchemy.future import select
@@ -50,13 +53,15 @@ async def user_list(session: AsyncSession = Depends(get_session)):
 
         user_list = []
         for user in users:
+            login_status, last_seen = presence_tracker.overlay(user.user_id, user.login_status, user.last_seen)
             user_list.append({
                 "user_id": str(user.user_id),
                 "username": user.username,
                 "email": user.email,
                 "image": user.image,
                 "block_status": user.block_status,
-                "login_status": user.login_status,
+                "login_status": login_status,
+                "last_seen": last_seen.isoformat() if last_seen else None,
             })
 
         return JSONResponse(status_code=200, content={"users": user_list})
@@ -138,15 +143,9 @@ async def user_create(user_data: UserCreate, session: AsyncSession = Depends(get
         raise HTTPException(
             status_code=400, detail="Password must be at least 8 characters, contain 1 uppercase, 1 lowercase, 1 digit, and 1 special character.")
 
-    user_exists_with_email = await admin_service.exist_email(email, session)
-    user_exists_with_username = await admin_service.exist_username(username, session)
-
-    if user_exists_with_email:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Email already exists")
-    if user_exists_with_username:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Username already exists")
+    conflict = await signup_conflict(email, username, session)
+    if conflict:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=conflict)
     if user_data.password != user_data.confirm_password:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Passwords do not match")
@@ -277,3 +276,27 @@ async def bloge_delete(BlogeID: UUID,session: AsyncSession = Depends(get_session
     update_user = await admin_service.bloge_delete(BlogeID,session)
 
     return JSONResponse(status_code=200, content={"message": "Profile updated successfully"})
+
+
+@admin_router.get("/feed_cache_stats", response_model=dict)
+async def feed_cache_stats(admin_details: dict = Depends(access_token_bearer)):
+    return JSONResponse(
+        status_code=200,
+        content={"feed_cache": feed_cache.stats(), "single_flight": read_flight.stats()}
+    )
+
+
+@admin_router.get("/db_pool_stats", response_model=dict)
+async def db_pool_stats(admin_details: dict = Depends(access_token_bearer)):
+    return JSONResponse(status_code=200, content={"db_pool": pool_stats()})
+
+
+@admin_router.get("/profiles", response_model=dict)
+async def list_profiles(admin_details: dict = Depends(access_token_bearer)):
+    return JSONResponse(status_code=200, content={"profiles": capture_store.list()})
+
+
+@admin_router.get("/profiles/{capture_id}")
+async def download_profile(capture_id: str, admin_details: dict = Depends(access_token_bearer)):
+    path = capture_store.path_for(capture_id)
+    return FileResponse(path, media_type="application/json", filename=path.name)
@@ -2,39 +2,28 @@ from src.db.models import *
 from .schemas import *
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
-from src.utils import generate_passwd_hash, UPLOAD_DIR, random_code
+from src.utils import password_hasher, UPLOAD_DIR, random_code
+from src.cache import feed_cache
+from src.usernames import username_index
+from src.accounts import raise_unique_violation
+from src.upload import upload_media
+from src.images import image_derivatives
 from fastapi import UploadFile, File, HTTPException, status, WebSocket, WebSocketDisconnect
 import logging
 from uuid import UUID
 import traceback
 from dotenv import load_dotenv
-import os
-import boto3
 import pytz
 import hmac
 import hashlib
 from fastapi import Query
 import re
 from typing import Optional
-from botocore.exceptions import ClientError
-import mimetypes
-import asyncio
 
 load_dotenv()
 
-BUCKET_NAME = os.getenv('S3_BUCKET_NAME')
-AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
-AWS_REGION = os.getenv('AWS_REGION')
-
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION
-)
-
 
 class Validation:
     async def validate_text(self, text: str, session: AsyncSession) -> bool:
@@ -128,54 +117,19 @@ class AdminService:
             create_at=create_at,
             update_at=update_at
         )
-        new_user.password = generate_passwd_hash(user_data_dict['password'])
+        new_user.password = await password_hasher.hash(user_data_dict['password'])
 
         session.add(new_user)
-        await session.commit()
-        await session.refresh(new_user)
-
-        return new_user
-
-    async def upload_to_s3_bucket(self, file: UploadFile, folder_name: str) -> str:
-        try:
-            file_path = f"{folder_name}/{file.filename}"
-            content_type, _ = mimetypes.guess_type(file.filename)
-            content_type = content_type or "application/octet-stream"
-
-            def upload():
-                s3_client.put_object(
-                    Bucket=BUCKET_NAME,
-                    Key=file_path,
-                    Body=file.file,
-                    ContentType=content_type
-                )
-
-            await asyncio.to_thread(upload)
-            file_url = f"https://{BUCKET_NAME}.s3.amazonaws.com/{file_path}"
-            return file_url
-
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to upload file '{file.filename}' to S3: {e.response['Error']['Message']}"
-            )
-        
-    async def delete_folder_contents(self, bucket_name, folder_name):
         try:
+            await session.commit()
+        except IntegrityError as e:
+            # A concurrent signup took the email or username after the
+            # pre-check; the unique indexes make the insert fail instead.
+            await session.rollback()
+            raise_unique_violation(e)
 
-            response = s3_client.list_objects_v2(Bucket=bucket_name, Prefix=folder_name)
-
-            if 'Contents' not in response:
-                return True
-
-            file_keys = [{'Key': obj['Key']} for obj in response['Contents']]
-
-            s3_client.delete_objects(Bucket=bucket_name, Delete={'Objects': file_keys})
-
-            return True
-        except ClientError as e:
-            return False
-
+        username_index.add(new_user.username)
+        return new_user
 
     async def create_bloge(
         self,
@@ -190,11 +144,7 @@ class AdminService:
             local_time = utc_time.astimezone(ist)
             local_time_naive = local_time.replace(tzinfo=None)
 
-            timestamp_str = local_time.strftime("%Y-%m-%d_%H-%M-%S")
-
-            folder_name = f"User/bloge/{timestamp_str}"
-
-            photo_url = await self.upload_to_s3_bucket(photo, folder_name) if photo else None
+            photo_url = await upload_media(photo) if photo else None
 
             new_bloge = BlogCreate(
                 photo=photo_url,
@@ -206,8 +156,14 @@ class AdminService:
 
             session.add(new_bloge)
             await session.commit()
+            feed_cache.invalidate_first_pages()
+
+            if photo_url:
+                await image_derivatives.schedule_blog_photo(photo_url, new_bloge.blog_uid)
 
             return new_bloge
+        except HTTPException:
+            raise
         except Exception as e:
             await session.rollback()
             raise Exception(f"Error creating policy info: {str(e)}")
@@ -220,42 +176,27 @@ class AdminService:
         session: AsyncSession
     ):
         try:
-            ist = pytz.timezone("Asia/Kolkata")
-            utc_time = datetime.utcnow().replace(tzinfo=pytz.utc)
-            local_time = utc_time.astimezone(ist)
-            timestamp_str = local_time.strftime("%Y-%m-%d_%H-%M-%S")
-
             photo_url = None
             if photo:
-                folder_name = f"User/bloge/{timestamp_str}"
-                photo_url = await self.upload_to_s3_bucket(photo, folder_name)
+                photo_url = await upload_media(photo)
             result = await session.execute(select(BlogCreate).where(BlogCreate.blog_uid == BlogeID))
             blog_record = result.scalars().first()
 
             if not blog_record:
                 raise HTTPException(status_code=404, detail="Blog not found")
-            
-            def extract_folder_name(url):
-                parts = url.split("/")
-                folder_name = "/".join(parts[3:-1])
-                return folder_name
-            
-            folder_name = extract_folder_name(blog_record.photo)
-
-            deletion = await self.delete_folder_contents(BUCKET_NAME, folder_name)
-            if not deletion:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to delete folder '{folder_name}' from bucket '{BUCKET_NAME}'."
-                    )
 
             for field, value in Bloge_info.dict().items():
                 setattr(blog_record, field, value)
 
             if photo_url:
                 blog_record.photo = photo_url
+                blog_record.photo_variants = None
 
             await session.commit()
+            feed_cache.invalidate_blog(BlogeID)
+
+            if photo_url:
+                await image_derivatives.schedule_blog_photo(photo_url, BlogeID)
 
             return {"message": "Blog updated successfully"}
 
@@ -275,28 +216,13 @@ class AdminService:
         try:
             file_url = None
             if image:
-                folder_name = f"User/profile_images/{user_data.username}"
-                file_url = await self.upload_to_s3_bucket(image, folder_name) if image else None
+                file_url = await upload_media(image)
 
             result = await session.execute(
                 select(usertable).where(usertable.user_id == user_Id)
             )
             user = result.scalars().first()
 
-            def extract_folder_name(url):
-                parts = url.split("/")
-                folder_name = "/".join(parts[3:-1])
-                return folder_name
-            
-            folder_name = extract_folder_name(user.image)
-    
-            deletion = await self.delete_folder_contents(BUCKET_NAME, folder_name)
-            if not deletion:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to delete folder '{folder_name}' from bucket '{BUCKET_NAME}'."
-                    )
-            
             if not user:
                 return {"error": "User not found"}
 
@@ -305,12 +231,24 @@ class AdminService:
 
             if file_url:
                 user.image = file_url
+                user.image_variants = None
 
             session.add(user)
-            await session.commit()
+            try:
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                raise_unique_violation(e)
+            username_index.add(user.username)
+            feed_cache.invalidate_author(user.user_id)
+
+            if file_url:
+                await image_derivatives.schedule_profile_image(file_url, user_Id)
 
             return {"message": "Profile updated successfully"}
 
+        except HTTPException:
+            raise
         except Exception as e:
             await session.rollback()
             raise HTTPException(
@@ -394,6 +332,7 @@ class AdminService:
             bloge.delete_status = True
             session.add(bloge)
             await session.commit()
+            feed_cache.invalidate_blog(BlogeID)
 
             return {"message": "User deleted successfully"}
 
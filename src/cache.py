@@ -0,0 +1,221 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from src.config import Config
+
+
+class FeedCache:
+    """
+    Bounded TTL/LRU cache for feed pages.
+
+    Every method is synchronous, so each call runs to completion on the event
+    loop without interleaving. A miss hands out a generation number which
+    ``set`` checks, so a page read before an invalidation is never stored
+    after it.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._generation = 0
+        self._entries = OrderedDict()
+        self._keys_by_blog = {}
+        self._keys_by_author = {}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, _, _, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value, self._generation
+            self._discard(key)
+        self.misses += 1
+        return None, self._generation
+
+    def set(self, key, value, blog_uids, generation: int, author_ids=()):
+        if generation != self._generation or self.maxsize <= 0:
+            return
+        self._discard(key)
+        self._entries[key] = (time.monotonic() + self.ttl, blog_uids, author_ids, value)
+        for blog_uid in blog_uids:
+            self._keys_by_blog.setdefault(blog_uid, set()).add(key)
+        for author_id in author_ids:
+            self._keys_by_author.setdefault(author_id, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    def invalidate_blog(self, blog_uid):
+        """Drop every cached page that contains ``blog_uid``."""
+        self._generation += 1
+        for key in list(self._keys_by_blog.get(blog_uid, ())):
+            self._discard(key)
+            self.invalidations += 1
+
+    def invalidate_author(self, user_id):
+        """Drop every cached page showing a post by ``user_id``, e.g. after a profile change."""
+        self._generation += 1
+        for key in list(self._keys_by_author.get(user_id, ())):
+            self._discard(key)
+            self.invalidations += 1
+
+    def invalidate_first_pages(self):
+        """
+        Drop the cursor-less pages. A new post only ever lands on the first
+        page of a keyset-paginated feed; later pages are anchored by their
+        cursor and stay valid.
+        """
+        self._generation += 1
+        for key in [key for key in self._entries if key[0] is None]:
+            self._discard(key)
+            self.invalidations += 1
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+        self._keys_by_blog.clear()
+        self._keys_by_author.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for index, ids in ((self._keys_by_blog, entry[1]), (self._keys_by_author, entry[2])):
+            for tag in ids:
+                keys = index.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del index[tag]
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical reads: the first caller for a key runs the
+    query and everyone who arrives while it is in flight awaits the same result.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.executions = 0
+        self.coalesced = 0
+        self._calls = {}
+
+    async def do(self, key, fn):
+        if not self.enabled:
+            return await fn()
+
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader's request was cancelled; retry and lead ourselves.
+                if future.cancelled():
+                    continue
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.executions += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark the exception retrieved in case nobody else was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
+
+
+class TokenCache:
+    """
+    LRU of verified JWT payloads keyed by the token's SHA-256, so repeat calls
+    skip HMAC verification and JSON parsing. An entry never outlives the
+    token's own ``exp``.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, token: str):
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, token: str, payload: dict):
+        expires_at = payload.get("exp")
+        if expires_at is None or self.maxsize <= 0:
+            return
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        self._entries[key] = (float(expires_at), payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+feed_cache = FeedCache(
+    maxsize=Config.FEED_CACHE_SIZE,
+    ttl=Config.FEED_CACHE_TTL_SECONDS
+)
+
+read_flight = SingleFlight(enabled=Config.SINGLE_FLIGHT_ENABLED)
+token_cache = TokenCache(maxsize=Config.JWT_CACHE_SIZE)
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings,SettingsConfigDict
+from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL : str
@@ -14,7 +15,63 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = False
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
-    
+    MAIL_WORKERS: int = 2
+    MAIL_QUEUE_SIZE: int = 1000
+    MAIL_MAX_RETRIES: int = 4
+    MAIL_RETRY_BACKOFF_SECONDS: float = 1
+    MAIL_TIMEOUT_SECONDS: float = 30
+    OTP_BACKEND: str = "database"
+    OTP_TTL_SECONDS: int = 60
+    OTP_MAX_ATTEMPTS: int = 5
+    OTP_RETAIN_SECONDS: int = 900
+    OTP_SWEEP_INTERVAL_SECONDS: float = 60
+    OTP_SWEEP_BATCH: int = 1000
+    JWT_CACHE_SIZE: int = 4096
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_AUTO_MIGRATE: bool = False
+    SLOW_QUERY_MS: float = 200
+    SQL_DEBUG_HEADERS: bool = False
+    METRICS_TOKEN: Optional[str] = None
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_CAPTURES: int = 50
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_SECONDS: float = 0.001
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    UPLOAD_PART_BYTES: int = 8 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 256 * 1024
+    STORAGE_BACKEND: str = "s3"
+    S3_BUCKET_NAME: Optional[str] = None
+    AWS_ACCESS_KEY_ID: Optional[str] = None
+    AWS_SECRET_ACCESS_KEY: Optional[str] = None
+    AWS_REGION: Optional[str] = None
+    UPLOAD_DIR: str = "uploads"
+    MEDIA_BASE_URL: Optional[str] = None
+    DIRECT_UPLOAD_EXPIRES_SECONDS: int = 600
+    IMAGE_WORKERS: int = 2
+    IMAGE_MAX_PENDING: int = 32
+    FEED_CACHE_SIZE: int = 256
+    FEED_CACHE_TTL_SECONDS: float = 15
+    SINGLE_FLIGHT_ENABLED: bool = True
+    USERNAME_INDEX_CAPACITY: int = 100000
+    USERNAME_INDEX_ERROR_RATE: float = 0.01
+    USERNAME_INDEX_REBUILD_SECONDS: float = 300
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN: str = "10/60"
+    RATE_LIMIT_OTP: str = "10/300"
+    RATE_LIMIT_WRITE: str = "120/60"
+    RATE_LIMIT_SHARDS: int = 64
+    RATE_LIMIT_SWEEP_SECONDS: float = 60
+    PRESENCE_FLUSH_SECONDS: float = 30
+    PRESENCE_FLUSH_BATCH: int = 500
+
     model_config = SettingsConfigDict(
         env_file= '.env',
         extra= "ignore"
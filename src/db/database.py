@@ -1,31 +1,132 @@
-from sqlmodel import create_engine,text,SQLModel
-from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import text,SQLModel
+from sqlalchemy import event, exc, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from src.config import Config
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
+import time
 from .models import *
+from .migrations import pending_migrations, upgrade
+from .instrumentation import instrument
 
 
-engine = AsyncEngine(
-    create_engine(
-        url=Config.DATABASE_URL,
-        echo=True
-    )
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _pool_options(url) -> dict:
+    # Every connection to an in-memory SQLite database gets its own empty
+    # database, so there is exactly one, kept open for the life of the
+    # process. Sessions take turns on it; sharing it concurrently (StaticPool)
+    # would let one session commit or roll back another's work.
+    if _is_memory_sqlite(url):
+        return {
+            "poolclass": TimedQueuePool,
+            "pool_size": 1,
+            "max_overflow": 0,
+            "pool_timeout": Config.DB_POOL_TIMEOUT,
+            "pool_recycle": -1,
+            "connect_args": {"check_same_thread": False},
+        }
+    if url.get_backend_name() == "sqlite":
+        return {
+            "poolclass": TimedQueuePool,
+            "pool_size": Config.DB_POOL_SIZE,
+            "max_overflow": Config.DB_MAX_OVERFLOW,
+            "pool_timeout": Config.DB_POOL_TIMEOUT,
+        }
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": Config.DB_POOL_SIZE,
+        "max_overflow": Config.DB_MAX_OVERFLOW,
+        "pool_timeout": Config.DB_POOL_TIMEOUT,
+        "pool_recycle": Config.DB_POOL_RECYCLE,
+        "pool_pre_ping": Config.DB_POOL_PRE_PING,
+    }
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # Enforce foreign keys like PostgreSQL does, and wait for a competing
+    # writer instead of failing with "database is locked".
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    if not _is_memory_sqlite(engine.url):
+        # WAL lets readers run alongside the single writer; NORMAL only
+        # fsyncs at checkpoints, which is safe in WAL mode.
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+database_url = make_url(Config.DATABASE_URL)
+engine = create_async_engine(
+    database_url,
+    echo=Config.DB_ECHO,
+    **_pool_options(database_url)
 )
+if database_url.get_backend_name() == "sqlite":
+    event.listen(engine.sync_engine, "connect", _configure_sqlite)
+instrument(engine)
 
-async def init_db():
+async_session = sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+
+async def upgrade_db() -> list:
     async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
-        await conn.commit()
+        return await conn.run_sync(upgrade)
 
-async def get_session() -> AsyncSession:
-    Session = sessionmaker(
-        bind=engine,
-        class_=AsyncSession,
-        expire_on_commit=False
-    )
 
-    async with Session() as session:
+async def init_db():
+    # Startup only compares schema_migrations with the known migrations; the
+    # schema itself is changed by `python -m src.db.migrate upgrade`.
+    if Config.DB_AUTO_MIGRATE:
+        await upgrade_db()
+        return
+
+    async with engine.connect() as conn:
+        pending = await conn.run_sync(pending_migrations)
+    if pending:
+        await engine.dispose()
+        raise RuntimeError(
+            f"Database schema is missing migrations {', '.join(pending)}; "
+            "run `python -m src.db.migrate upgrade` first"
+        )
+
+async def get_session() -> AsyncSession:
+    async with async_session() as session:
         try:
             yield session 
             await session.commit()
@@ -34,3 +135,21 @@ async def get_session() -> AsyncSession:
             raise
         finally:
             await session.close()
+
+
+def pool_stats() -> dict:
+    pool = engine.pool
+    if not isinstance(pool, TimedQueuePool):
+        return {"pool": pool.status()}
+
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "avg_wait_ms": round(pool.total_wait / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+        "max_wait_ms": round(pool.max_wait * 1000, 3),
+    }
@@ -0,0 +1,120 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from src.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_LOG_CHARS = 1000
+
+
+class QueryStats:
+    """Statements run on behalf of one request."""
+
+    __slots__ = ("scope", "count", "seconds")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.count = 0
+        self.seconds = 0.0
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route") if self.scope else None
+        return route.path if route is not None else "-"
+
+
+# Set per request by QueryStatsMiddleware. AsyncSession runs the sync engine
+# in a greenlet that shares the caller's context, so the engine events below
+# see the same QueryStats object the request handler does.
+current_queries: ContextVar[Optional[QueryStats]] = ContextVar("current_queries", default=None)
+
+# Process-wide totals, including statements run outside any request.
+query_totals = {"statements": 0, "seconds": 0.0, "slow": 0}
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+
+    query_totals["statements"] += 1
+    query_totals["seconds"] += elapsed
+
+    stats = current_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+    if elapsed * 1000 >= Config.SLOW_QUERY_MS:
+        query_totals["slow"] += 1
+        logger.warning(
+            f"Slow query {elapsed * 1000:.1f}ms route={stats.route if stats else '-'}: "
+            f"{' '.join(statement.split())[:SLOW_QUERY_LOG_CHARS]}"
+        )
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for failed statements.
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def instrument(engine):
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def query_stats() -> dict:
+    return {
+        "statements": query_totals["statements"],
+        "seconds": round(query_totals["seconds"], 6),
+        "slow": query_totals["slow"],
+    }
+
+
+class QueryStatsMiddleware:
+    """
+    Gives each HTTP request its own QueryStats and, when ``debug_headers`` is
+    on, reports them as X-SQL-Queries / X-SQL-Time-Ms response headers. If a
+    metrics registry is passed, per-route statement counts are recorded too.
+    """
+
+    def __init__(self, app, registry=None, debug_headers: bool = False):
+        self.app = app
+        self.registry = registry
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        token = current_queries.set(stats)
+
+        async def send_wrapper(message):
+            if self.debug_headers and message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"x-sql-queries", str(stats.count).encode()),
+                    (b"x-sql-time-ms", f"{stats.seconds * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_queries.reset(token)
+            if self.registry is not None:
+                route = scope.get("route")
+                if route is not None:
+                    self.registry.record_queries(scope["method"], route.path, stats.count, stats.seconds)
@@ -0,0 +1,30 @@
+"""
+Schema migrations for the configured DATABASE_URL.
+
+    python -m src.db.migrate upgrade    apply pending migrations
+    python -m src.db.migrate status     list pending migrations
+"""
+import argparse
+import asyncio
+from .database import engine, upgrade_db
+from .migrations import pending_migrations
+
+
+async def main(command: str):
+    try:
+        if command == "upgrade":
+            applied = await upgrade_db()
+            print(f"Applied {', '.join(applied)}" if applied else "Database is up to date")
+        else:
+            async with engine.connect() as conn:
+                pending = await conn.run_sync(pending_migrations)
+            print(f"Pending {', '.join(pending)}" if pending else "Database is up to date")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=["upgrade", "status"])
+    args = parser.parse_args()
+    asyncio.run(main(args.command))
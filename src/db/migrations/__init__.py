@@ -0,0 +1,71 @@
+from datetime import datetime
+from sqlalchemy import inspect, text
+from . import (
+    m0000_initial_schema,
+    m0001_feed_index,
+    m0002_blog_reactions,
+    m0003_blog_comments,
+    m0004_image_variants,
+    m0005_hot_query_indexes,
+    m0006_otp_store,
+    m0007_last_seen,
+    m0008_username_lower,
+)
+
+
+MIGRATIONS = [
+    m0000_initial_schema,
+    m0001_feed_index,
+    m0002_blog_reactions,
+    m0003_blog_comments,
+    m0004_image_variants,
+    m0005_hot_query_indexes,
+    m0006_otp_store,
+    m0007_last_seen,
+    m0008_username_lower,
+]
+
+VERSION_TABLE = "schema_migrations"
+# Held for the transaction so concurrent upgrades on PostgreSQL run one at a time.
+ADVISORY_LOCK_KEY = 7301946
+
+
+def version_of(migration) -> str:
+    return migration.__name__.rsplit(".", 1)[-1].removeprefix("m")
+
+
+def applied_versions(connection) -> set:
+    if not inspect(connection).has_table(VERSION_TABLE):
+        return set()
+    return set(connection.execute(text(f"SELECT version FROM {VERSION_TABLE}")).scalars())
+
+
+def pending_migrations(connection) -> list:
+    applied = applied_versions(connection)
+    return [version_of(migration) for migration in MIGRATIONS if version_of(migration) not in applied]
+
+
+def upgrade(connection) -> list:
+    """Applies every pending migration in order and returns their versions."""
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+        "version VARCHAR(100) PRIMARY KEY, "
+        "applied_at TIMESTAMP NOT NULL)"
+    ))
+
+    applied = applied_versions(connection)
+    upgraded = []
+    for migration in MIGRATIONS:
+        version = version_of(migration)
+        if version in applied:
+            continue
+        migration.upgrade(connection)
+        connection.execute(
+            text(f"INSERT INTO {VERSION_TABLE} (version, applied_at) VALUES (:version, :applied_at)"),
+            {"version": version, "applied_at": datetime.utcnow()}
+        )
+        upgraded.append(version)
+    return upgraded
@@ -0,0 +1,10 @@
+from sqlmodel import SQLModel
+from src.db import models
+
+
+def upgrade(connection):
+    # Databases from before versioned migrations were built by create_all at
+    # every startup. Doing it once here creates whatever tables are missing
+    # and leaves existing ones alone; the migrations after it bring those up
+    # to date.
+    SQLModel.metadata.create_all(connection)
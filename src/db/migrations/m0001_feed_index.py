@@ -0,0 +1,10 @@
+from sqlalchemy import text
+
+
+def upgrade(connection):
+    # create_all only creates missing tables, so existing databases need the
+    # feed index added explicitly.
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_blogcreate_feed "
+        "ON blogcreate (delete_status, create_at, blog_uid)"
+    ))
@@ -0,0 +1,58 @@
+from sqlalchemy import inspect, text
+
+
+def upgrade(connection):
+    columns = {
+        column["name"]: column
+        for column in inspect(connection).get_columns("blogcreate")
+    }
+
+    if "like_count" not in columns:
+        connection.execute(text(
+            "ALTER TABLE blogcreate ADD COLUMN like_count INTEGER NOT NULL DEFAULT 0"
+        ))
+    if "dislike_count" not in columns:
+        connection.execute(text(
+            "ALTER TABLE blogcreate ADD COLUMN dislike_count INTEGER NOT NULL DEFAULT 0"
+        ))
+
+    # Databases created before blog_reaction still carry the likes/dislikes
+    # arrays. They are backfilled once, then made nullable so new rows no longer
+    # need them; a nullable likes column marks the backfill as done.
+    likes = columns.get("likes")
+    if likes is None or likes["nullable"]:
+        return
+
+    connection.execute(text("""
+        INSERT INTO blog_reaction (blog_uid, user_id, kind, create_at)
+        SELECT b.blog_uid, r.user_id, :kind, b.update_at
+        FROM blogcreate b
+        CROSS JOIN LATERAL unnest(b.likes) AS r(user_id)
+        JOIN usertable u ON u.user_id = r.user_id
+        ON CONFLICT (blog_uid, user_id) DO NOTHING
+    """), {"kind": "like"})
+    connection.execute(text("""
+        INSERT INTO blog_reaction (blog_uid, user_id, kind, create_at)
+        SELECT b.blog_uid, r.user_id, :kind, b.update_at
+        FROM blogcreate b
+        CROSS JOIN LATERAL unnest(b.dislikes) AS r(user_id)
+        JOIN usertable u ON u.user_id = r.user_id
+        ON CONFLICT (blog_uid, user_id) DO NOTHING
+    """), {"kind": "dislike"})
+
+    connection.execute(text("""
+        UPDATE blogcreate b SET
+            like_count = (
+                SELECT count(*) FROM blog_reaction r
+                WHERE r.blog_uid = b.blog_uid AND r.kind = 'like'
+            ),
+            dislike_count = (
+                SELECT count(*) FROM blog_reaction r
+                WHERE r.blog_uid = b.blog_uid AND r.kind = 'dislike'
+            )
+    """))
+
+    connection.execute(text(
+        "ALTER TABLE blogcreate ALTER COLUMN likes DROP NOT NULL, "
+        "ALTER COLUMN dislikes DROP NOT NULL"
+    ))
@@ -0,0 +1,45 @@
+from sqlalchemy import inspect, text
+
+
+def upgrade(connection):
+    columns = {
+        column["name"]: column
+        for column in inspect(connection).get_columns("blogcreate")
+    }
+
+    if "comment_count" not in columns:
+        connection.execute(text(
+            "ALTER TABLE blogcreate ADD COLUMN comment_count INTEGER NOT NULL DEFAULT 0"
+        ))
+
+    # Same pattern as the reactions backfill: copy the legacy JSONB comments
+    # into blog_comment once, then make the column nullable to mark it done.
+    comments = columns.get("comments")
+    if comments is None or comments["nullable"]:
+        return
+
+    connection.execute(text("""
+        INSERT INTO blog_comment (comment_uid, blog_uid, user_id, username, user_photo, comment, timestamp)
+        SELECT
+            (c->>'comment_uid')::uuid,
+            b.blog_uid,
+            (c->>'user_id')::uuid,
+            c->>'username',
+            c->>'user_photo',
+            c->>'comment',
+            (c->>'timestamp')::timestamp
+        FROM blogcreate b
+        CROSS JOIN LATERAL jsonb_array_elements(b.comments) AS c
+        JOIN usertable u ON u.user_id = (c->>'user_id')::uuid
+        ON CONFLICT (comment_uid) DO NOTHING
+    """))
+
+    connection.execute(text("""
+        UPDATE blogcreate b SET comment_count = (
+            SELECT count(*) FROM blog_comment c WHERE c.blog_uid = b.blog_uid
+        )
+    """))
+
+    connection.execute(text(
+        "ALTER TABLE blogcreate ALTER COLUMN comments DROP NOT NULL"
+    ))
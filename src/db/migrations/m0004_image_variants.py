@@ -0,0 +1,11 @@
+from sqlalchemy import inspect, text
+
+
+def upgrade(connection):
+    json_type = "JSONB" if connection.dialect.name == "postgresql" else "JSON"
+    inspector = inspect(connection)
+
+    for table, column in (("blogcreate", "photo_variants"), ("usertable", "image_variants")):
+        columns = {existing["name"] for existing in inspector.get_columns(table)}
+        if column not in columns:
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {json_type}"))
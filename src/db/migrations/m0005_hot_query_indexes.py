@@ -0,0 +1,30 @@
+from sqlalchemy import text
+
+
+UNIQUE_INDEXES = (
+    ("ux_usertable_username", "username"),
+    ("ux_usertable_email_lower", "lower(email)"),
+)
+
+
+def upgrade(connection):
+    for name, expression in UNIQUE_INDEXES:
+        duplicates = connection.execute(text(
+            f"SELECT {expression} FROM usertable GROUP BY {expression} HAVING count(*) > 1 LIMIT 5"
+        )).scalars().all()
+        if duplicates:
+            raise RuntimeError(
+                f"Cannot create {name}: usertable has duplicate {expression} values "
+                f"(for example {', '.join(map(repr, duplicates))}); resolve them and run the upgrade again"
+            )
+        connection.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON usertable ({expression})"))
+
+    # Profile pages filter a single author's posts.
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_blogcreate_user_id ON blogcreate (user_id)"))
+
+    # OTP checks look up (email, otp); the composite index also serves
+    # email-only lookups, so the old single-column one goes.
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_otp_verification_email_otp ON otp_verification (email, otp)"
+    ))
+    connection.execute(text("DROP INDEX IF EXISTS ix_otp_verification_email"))
@@ -0,0 +1,41 @@
+from sqlalchemy import inspect, text
+
+
+def upgrade(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("otp_verification")}
+
+    if "attempts" not in columns:
+        connection.execute(text(
+            "ALTER TABLE otp_verification ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0"
+        ))
+    if "expires_at" not in columns:
+        # Codes issued before this migration count as already expired; they
+        # can still be resent until the sweeper removes them.
+        connection.execute(text("ALTER TABLE otp_verification ADD COLUMN expires_at TIMESTAMP"))
+        connection.execute(text("UPDATE otp_verification SET expires_at = created_at"))
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("ALTER TABLE otp_verification ALTER COLUMN expires_at SET NOT NULL"))
+
+    # Every send used to insert a new row; keep only the latest per email.
+    connection.execute(text("""
+        DELETE FROM otp_verification
+        WHERE EXISTS (
+            SELECT 1 FROM otp_verification newer
+            WHERE newer.email = otp_verification.email
+              AND (
+                  newer.updated_at > otp_verification.updated_at
+                  OR (
+                      newer.updated_at = otp_verification.updated_at
+                      AND newer.otp_verification_uid > otp_verification.otp_verification_uid
+                  )
+              )
+        )
+    """))
+
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_otp_verification_email ON otp_verification (email)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_otp_verification_expires_at ON otp_verification (expires_at)"
+    ))
+    connection.execute(text("DROP INDEX IF EXISTS ix_otp_verification_email_otp"))
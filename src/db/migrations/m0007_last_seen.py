@@ -0,0 +1,7 @@
+from sqlalchemy import inspect, text
+
+
+def upgrade(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("usertable")}
+    if "last_seen" not in columns:
+        connection.execute(text("ALTER TABLE usertable ADD COLUMN last_seen TIMESTAMP"))
@@ -0,0 +1,18 @@
+from sqlalchemy import text
+
+
+def upgrade(connection):
+    # Signup lowercases the name before checking it, so "John Doe" and
+    # "john doe" must collide; the old index only caught exact matches.
+    duplicates = connection.execute(text(
+        "SELECT lower(username) FROM usertable GROUP BY lower(username) HAVING count(*) > 1 LIMIT 5"
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            f"Cannot create ux_usertable_username_lower: usertable has usernames differing only in case "
+            f"(for example {', '.join(map(repr, duplicates))}); resolve them and run the upgrade again"
+        )
+    connection.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_usertable_username_lower ON usertable (lower(username))"
+    ))
+    connection.execute(text("DROP INDEX IF EXISTS ux_usertable_username"))
@@ -1,8 +1,9 @@
 
 from sqlmodel import SQLModel, Field, Column,ForeignKey
+from sqlalchemy import Index, Integer, func
 from datetime import date, datetime
 import uuid
-import sqlalchemy.dialects.postgresql as pg
+from .types import GUID, JSONDocument, Timestamp
 from typing import List, Optional
 
 
@@ -10,7 +11,7 @@ class usertable(SQLModel, table=True):
     __tablename__ = "usertable"
     user_id: uuid.UUID = Field(
         sa_column=Column(
-            pg.UUID,
+            GUID,
             nullable=False,
             primary_key=True,
             default=uuid.uuid4
@@ -19,82 +20,146 @@ class usertable(SQLModel, table=True):
     username: str
     email: str = Field(index=True)
     image: str = Field(default="")
+    image_variants: Optional[dict] = Field(default=None, sa_column=Column(JSONDocument, nullable=True))
     password: str = Field(default=None, nullable=True) 
     block_status: bool = Field(default=False)
     login_status: bool = Field(default=False)
+    last_seen: Optional[datetime] = Field(default=None, sa_column=Column(Timestamp, nullable=True))
     delete_status: bool = Field(default=False)
     role: str = Field(default="user", max_length=20,nullable=False)
-    create_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.utcnow))
-    update_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.utcnow))
+    create_at: datetime = Field(sa_column=Column(Timestamp, default=datetime.utcnow))
+    update_at: datetime = Field(sa_column=Column(Timestamp, default=datetime.utcnow))
 
     def __repr__(self):
         return f"<UserTable {self.username}>"
 
+
+# Emails and usernames are compared case-insensitively, so uniqueness is on
+# their lowercased values.
+Index("ux_usertable_email_lower", func.lower(usertable.email), unique=True)
+Index("ux_usertable_username_lower", func.lower(usertable.username), unique=True)
+
+
 class OTPVerification(SQLModel, table=True):
     __tablename__ = "otp_verification"
-    
+    __table_args__ = (
+        # One pending code per email; every OTP operation looks the row up by email.
+        Index("ux_otp_verification_email", "email", unique=True),
+        Index("ix_otp_verification_expires_at", "expires_at"),
+    )
+
     otp_verification_uid: uuid.UUID = Field(
-        sa_column=Column(pg.UUID, primary_key=True, nullable=False, default=uuid.uuid4)
+        sa_column=Column(GUID, primary_key=True, nullable=False, default=uuid.uuid4)
     )
-    email: str = Field(index=True)
+    email: str
     otp: str = Field(nullable=True)
+    attempts: int = Field(
+        default=0,
+        sa_column=Column(Integer, nullable=False, default=0, server_default="0")
+    )
+    expires_at: datetime = Field(sa_column=Column(Timestamp, nullable=False))
     created_at: datetime = Field(
-        sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.utcnow)
+        sa_column=Column(Timestamp, nullable=False, default=datetime.utcnow)
     )
     updated_at: datetime = Field(
-        sa_column=Column(pg.TIMESTAMP, nullable=False, default=datetime.utcnow)
+        sa_column=Column(Timestamp, nullable=False, default=datetime.utcnow)
     )
 
     def __repr__(self):
         return f"<OTPVerification {self.message}>"
 
-class Comment(SQLModel):
-    comment_uid: uuid.UUID = Field(default_factory=uuid.uuid4)
-    user_id: uuid.UUID
-    username: str
-    user_photo: Optional[str] = Field(default=None)
-    comment: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
-
 class BlogCreate(SQLModel, table=True):
     __tablename__ = "blogcreate"
+    __table_args__ = (
+        # Backs the keyset-paginated feed: WHERE delete_status ORDER BY (create_at, blog_uid)
+        Index("ix_blogcreate_feed", "delete_status", "create_at", "blog_uid"),
+        Index("ix_blogcreate_user_id", "user_id"),
+    )
 
     blog_uid: uuid.UUID = Field(
         default_factory=uuid.uuid4,
-        sa_column=Column(pg.UUID(as_uuid=True), primary_key=True, nullable=False)
+        sa_column=Column(GUID, primary_key=True, nullable=False)
     )
     user_id: uuid.UUID = Field(
-        sa_column=Column(pg.UUID(as_uuid=True), ForeignKey("usertable.user_id"), nullable=False)
+        sa_column=Column(GUID, ForeignKey("usertable.user_id"), nullable=False)
     )
     photo: Optional[str] = Field(default=None, nullable=True)
+    photo_variants: Optional[dict] = Field(default=None, sa_column=Column(JSONDocument, nullable=True))
     description: Optional[str] = Field(default="", nullable=True)
     role: str = Field(default="user", max_length=20, nullable=True)
     delete_status: bool = Field(default=False)
 
-
-    likes: List[uuid.UUID] = Field(
-        default_factory=list,
-        sa_column=Column(pg.ARRAY(pg.UUID(as_uuid=True)), nullable=False, default=[])
+    like_count: int = Field(
+        default=0,
+        sa_column=Column(Integer, nullable=False, default=0, server_default="0")
     )
-    dislikes: List[uuid.UUID] = Field(
-        default_factory=list,
-        sa_column=Column(pg.ARRAY(pg.UUID(as_uuid=True)), nullable=False, default=[])
+    dislike_count: int = Field(
+        default=0,
+        sa_column=Column(Integer, nullable=False, default=0, server_default="0")
     )
-
-    comments: List[Comment] = Field(
-        default_factory=list,
-        sa_column=Column(pg.JSONB, nullable=False, default=[])
+    comment_count: int = Field(
+        default=0,
+        sa_column=Column(Integer, nullable=False, default=0, server_default="0")
     )
 
     create_at: datetime = Field(
         default_factory=datetime.utcnow,
-        sa_column=Column(pg.TIMESTAMP, nullable=False)
+        sa_column=Column(Timestamp, nullable=False)
     )
     update_at: datetime = Field(
         default_factory=datetime.utcnow,
-        sa_column=Column(pg.TIMESTAMP, nullable=False)
+        sa_column=Column(Timestamp, nullable=False)
+    )
+
+
+    def __repr__(self):
+        return f"<BlogCreate {self.blog_uid}>"
+
+
+class BlogReaction(SQLModel, table=True):
+    __tablename__ = "blog_reaction"
+
+    # The composite primary key doubles as the one-reaction-per-user constraint.
+    blog_uid: uuid.UUID = Field(
+        sa_column=Column(GUID, ForeignKey("blogcreate.blog_uid"), primary_key=True, nullable=False)
+    )
+    user_id: uuid.UUID = Field(
+        sa_column=Column(GUID, ForeignKey("usertable.user_id"), primary_key=True, nullable=False)
+    )
+    kind: str = Field(max_length=10, nullable=False)
+    create_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(Timestamp, nullable=False)
+    )
+
+    def __repr__(self):
+        return f"<BlogReaction {self.blog_uid} {self.user_id} {self.kind}>"
+
+
+
+class Comment(SQLModel, table=True):
+    __tablename__ = "blog_comment"
+    __table_args__ = (
+        Index("ix_blog_comment_blog_timestamp", "blog_uid", "timestamp", "comment_uid"),
     )
 
+    comment_uid: uuid.UUID = Field(
+        default_factory=uuid.uuid4,
+        sa_column=Column(GUID, primary_key=True, nullable=False)
+    )
+    blog_uid: uuid.UUID = Field(
+        sa_column=Column(GUID, ForeignKey("blogcreate.blog_uid"), nullable=False)
+    )
+    user_id: uuid.UUID = Field(
+        sa_column=Column(GUID, ForeignKey("usertable.user_id"), nullable=False)
+    )
+    username: str
+    user_photo: Optional[str] = Field(default=None)
+    comment: str
+    timestamp: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(Timestamp, nullable=False)
+    )
 
     def __repr__(self):
-        return f"<BlogCreate {self.blog_uid}>"
\ No newline at end of file
+        return f"<Comment {self.comment_uid}>"
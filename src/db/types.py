@@ -0,0 +1,16 @@
+from sqlalchemy import JSON, DateTime, Uuid
+import sqlalchemy.dialects.postgresql as pg
+
+
+# Column types that compile to the native PostgreSQL type in production and to
+# the closest cheap equivalent elsewhere, so the same models run on SQLite for
+# local benchmarking and single-node deployments.
+
+# Native uuid on PostgreSQL; CHAR(32) hex on SQLite. Python values are uuid.UUID either way.
+GUID = Uuid(as_uuid=True)
+
+# JSONB on PostgreSQL; SQLite stores JSON as TEXT and still supports json_extract.
+JSONDocument = JSON().with_variant(pg.JSONB(), "postgresql")
+
+# timestamp without time zone; the app stores naive datetimes throughout.
+Timestamp = DateTime(timezone=False)
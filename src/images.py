@@ -0,0 +1,185 @@
+import asyncio
+import io
+import logging
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import update
+from src.db.database import async_session
+from src.db.models import BlogCreate, usertable
+from src.cache import feed_cache
+from src.config import Config
+from src.storage import Storage, storage
+
+
+logger = logging.getLogger(__name__)
+
+# Longest edge, in pixels, of each derivative.
+VARIANT_SIZES = {
+    "thumb": 320,
+    "medium": 1080,
+}
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def render_variants(data: bytes) -> dict:
+    """
+    Decode once and encode every size/format pair. Runs in a worker process;
+    returns {"thumb_webp": (bytes, content_type), ...}.
+    """
+    from PIL import Image, ImageOps
+
+    largest = max(VARIANT_SIZES.values())
+    with Image.open(io.BytesIO(data)) as source:
+        # Lets the JPEG decoder downscale by a power of two while decoding.
+        source.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        variants = {}
+        for size_name, edge in sorted(VARIANT_SIZES.items(), key=lambda item: -item[1]):
+            resized = image.copy()
+            resized.thumbnail((edge, edge), Image.LANCZOS)
+            for format_name, (pil_format, content_type, options) in VARIANT_FORMATS.items():
+                encoded = resized if pil_format != "JPEG" or resized.mode == "RGB" else resized.convert("RGB")
+                output = io.BytesIO()
+                encoded.save(output, pil_format, **options)
+                variants[f"{size_name}_{format_name}"] = (output.getvalue(), content_type)
+            # Later, smaller sizes resample from this one instead of the original.
+            image = resized
+    return variants
+
+
+def render_stored_variants(original_key: str) -> dict:
+    """
+    Reads the original from storage inside the worker process, so its bytes
+    never sit in the API process while the job waits or runs.
+    """
+    from src.storage import storage
+
+    return render_variants(asyncio.run(storage.read(original_key)))
+
+
+def variant_names() -> list:
+    return [f"{size_name}_{format_name}" for size_name in VARIANT_SIZES for format_name in VARIANT_FORMATS]
+
+
+def variant_key(original_key: str, variant_name: str) -> str:
+    stem, _ = posixpath.splitext(original_key)
+    size_name, format_name = variant_name.split("_", 1)
+    extension = "jpg" if format_name == "jpeg" else format_name
+    return f"{stem}_{size_name}.{extension}"
+
+
+class ImageDerivatives:
+    """
+    Builds resized WebP/JPEG variants after an upload without holding up the
+    response. Decoding and encoding run in a ProcessPoolExecutor; the variant
+    URLs are written back only while the row still points at the same
+    original, so a slow job can never overwrite a newer photo's variants.
+    """
+
+    def __init__(self, storage: Storage, workers: int, max_pending: int):
+        self.storage = storage
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.skipped = 0
+        self._executor = None
+        self._tasks = set()
+
+    async def schedule_blog_photo(self, original_url: str, blog_uid):
+        await self._schedule(
+            self.storage.key_for(original_url),
+            update(BlogCreate)
+            .where(BlogCreate.blog_uid == blog_uid, BlogCreate.photo == original_url),
+            "photo_variants",
+            lambda: feed_cache.invalidate_blog(blog_uid)
+        )
+
+    async def schedule_profile_image(self, original_url: str, user_id):
+        await self._schedule(
+            self.storage.key_for(original_url),
+            update(usertable)
+            .where(usertable.user_id == user_id, usertable.image == original_url),
+            "image_variants",
+            # Feed cards show the author's avatar.
+            lambda: feed_cache.invalidate_author(user_id)
+        )
+
+    async def shutdown(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _schedule(self, original_key, statement, column, invalidate):
+        if self.pending >= self.max_pending:
+            # The row keeps serving the original image.
+            self.skipped += 1
+            logger.warning(f"Skipping image variants for {original_key}: {self.pending} jobs pending")
+            return
+
+        self.pending += 1
+        task = asyncio.create_task(self._build(original_key, statement, column, invalidate))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _build(self, original_key, statement, column, invalidate):
+        try:
+            # Keys follow the original's content hash, so a photo that was
+            # uploaded before already has its variants.
+            urls = await self._existing_variants(original_key)
+            if urls is None:
+                urls = await self._render(original_key)
+
+            async with async_session() as session:
+                await session.execute(statement.values({column: urls}))
+                await session.commit()
+
+            invalidate()
+
+        except Exception as e:
+            logger.error(f"Failed to build image variants for {original_key}: {e}")
+        finally:
+            self.pending -= 1
+
+    async def _existing_variants(self, original_key: str):
+        urls = {}
+        for name in variant_names():
+            key = variant_key(original_key, name)
+            if not await self.storage.exists(key):
+                return None
+            urls[name] = self.storage.url_for(key)
+        return urls
+
+    async def _render(self, original_key: str) -> dict:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        variants = await asyncio.get_running_loop().run_in_executor(
+            self._executor, render_stored_variants, original_key
+        )
+
+        urls = {}
+        for name, (body, content_type) in variants.items():
+            key = variant_key(original_key, name)
+            await self.storage.put(key, body, content_type)
+            urls[name] = self.storage.url_for(key)
+        return urls
+
+
+image_derivatives = ImageDerivatives(
+    storage,
+    workers=Config.IMAGE_WORKERS,
+    max_pending=Config.IMAGE_MAX_PENDING
+)
+
+
+def preferred_image(original: str, variants, name: str = "thumb_jpeg") -> str:
+    if variants and variants.get(name):
+        return variants[name]
+    return original
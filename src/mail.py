@@ -1,16 +1,127 @@
-from fastapi_mail import ConnectionConfig
+import asyncio
+import logging
+from email.message import EmailMessage
+from email.utils import formataddr
+import aiosmtplib
+from fastapi import HTTPException, status
 from src.config import Config
 
 
-mail_config = ConnectionConfig(
-    MAIL_USERNAME=Config.MAIL_USERNAME,
-    MAIL_PASSWORD=Config.MAIL_PASSWORD,
-    MAIL_FROM=Config.MAIL_FROM,
-    MAIL_PORT=587,
-    MAIL_SERVER=Config.MAIL_SERVER,
-    MAIL_FROM_NAME=Config.MAIL_FROM_NAME,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-)
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+
+class MailQueue:
+    """
+    Background delivery for outgoing mail. Requests only enqueue; a fixed set
+    of workers each keep one authenticated SMTP connection open and reuse it,
+    reconnecting and retrying with exponential backoff when a send fails.
+    """
+
+    def __init__(self, workers: int, maxsize: int, max_retries: int, backoff: float):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sent = 0
+        self.retries = 0
+        self.dropped = 0
+        self._queue = asyncio.Queue(maxsize=maxsize)
+        self._tasks = []
+
+    async def start(self):
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"mail-worker-{n}")
+            for n in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 10):
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Stopping mail queue with %d undelivered messages", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, message: EmailMessage):
+        if "From" not in message:
+            message["From"] = formataddr((Config.MAIL_FROM_NAME, Config.MAIL_FROM))
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Email service is busy, please try again shortly."
+            )
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "workers": len(self._tasks),
+            "sent": self.sent,
+            "retries": self.retries,
+            "dropped": self.dropped,
+        }
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=Config.MAIL_SERVER,
+            port=Config.MAIL_PORT,
+            use_tls=Config.MAIL_SSL_TLS,
+            start_tls=Config.MAIL_STARTTLS,
+            validate_certs=Config.VALIDATE_CERTS,
+            timeout=Config.MAIL_TIMEOUT_SECONDS
+        )
+        await client.connect()
+        if Config.USE_CREDENTIALS:
+            await client.login(Config.MAIL_USERNAME, Config.MAIL_PASSWORD)
+        return client
+
+    async def _worker(self):
+        client = None
+        try:
+            while True:
+                message = await self._queue.get()
+                try:
+                    client = await self._deliver(client, message)
+                except Exception as e:
+                    # Anything _deliver does not retry must not end the worker,
+                    # or the pool would shrink silently.
+                    self.dropped += 1
+                    logger.exception("Dropping mail to %s: %s", message["To"], e)
+                    if client is not None and client.is_connected:
+                        client.close()
+                    client = None
+                finally:
+                    self._queue.task_done()
+        finally:
+            if client is not None and client.is_connected:
+                client.close()
+
+    async def _deliver(self, client, message: EmailMessage):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                if client is None or not client.is_connected:
+                    client = await self._connect()
+                await client.send_message(message)
+                self.sent += 1
+                return client
+            except (aiosmtplib.SMTPException, OSError) as e:
+                if client is not None and client.is_connected:
+                    client.close()
+                client = None
+                if attempt == self.max_retries:
+                    self.dropped += 1
+                    logger.error("Giving up on mail to %s after %d attempts: %s", message["To"], attempt, e)
+                    return client
+                self.retries += 1
+                await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+        return client
+
+
+mail_queue = MailQueue(
+    workers=Config.MAIL_WORKERS,
+    maxsize=Config.MAIL_QUEUE_SIZE,
+    max_retries=Config.MAIL_MAX_RETRIES,
+    backoff=Config.MAIL_RETRY_BACKOFF_SECONDS
+)
@@ -2,16 +2,40 @@
 from fastapi import FastAPI,WebSocket,Depends,WebSocketDisconnect,Request
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
-from src.db.database import init_db
+from src.db.database import init_db, pool_stats, async_session
+from src.db.instrumentation import QueryStatsMiddleware, query_stats
+from src.config import Config
+from src.mail import mail_queue
+from src.images import image_derivatives
+from src.storage import storage, LocalStorage, IMMUTABLE_CACHE_CONTROL
+from src.upload import MEDIA_PREFIX, upload_pipeline
+from src.metrics import MetricsMiddleware, metrics_registry, CONTENT_TYPE
+from src.profiling import ProfilerMiddleware, capture_store
+from src.cache import feed_cache, read_flight, token_cache
+from src.usernames import username_index
+from src.otp import otp_store
+from src.presence import presence_tracker
+from src.ratelimit import RateLimitMiddleware, rate_limiter
 from src.admin_side.routes import admin_router
+from src.admin_side.dependencies import MetricsTokenBearer
 from src.user_side.routes import auth_router
-from fastapi.responses import Response
+from fastapi.responses import Response, FileResponse
+from fastapi.exceptions import HTTPException
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Server is starting...")
     await init_db()
+    await mail_queue.start()
+    username_index.start(async_session)
+    otp_store.start(async_session)
+    presence_tracker.start(async_session)
     yield
+    await presence_tracker.stop(async_session)
+    await otp_store.stop()
+    await username_index.stop()
+    await image_derivatives.shutdown()
+    await mail_queue.stop()
     print("Server is stopping...")
 
 
@@ -28,6 +52,9 @@ origins = [
     "https://mindmingle-backend.onrender.com"
 ]
 
+# Innermost of the stack, so a 429 still gets CORS headers and is counted by metrics.
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -36,6 +63,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(
+    ProfilerMiddleware,
+    store=capture_store,
+    sample_rate=Config.PROFILE_SAMPLE_RATE,
+    interval=Config.PROFILE_INTERVAL_SECONDS
+)
+app.add_middleware(QueryStatsMiddleware, registry=metrics_registry, debug_headers=Config.SQL_DEBUG_HEADERS)
+# Added last so it wraps everything above and times the whole request.
+app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
+metrics_registry.collect("feed_cache", feed_cache.stats)
+metrics_registry.collect("single_flight", read_flight.stats)
+metrics_registry.collect("token_cache", token_cache.stats)
+metrics_registry.collect("mail_queue", mail_queue.stats)
+metrics_registry.collect("db_pool", pool_stats)
+metrics_registry.collect("sql", query_stats)
+metrics_registry.collect("uploads", upload_pipeline.stats)
+metrics_registry.collect("username_index", username_index.stats)
+metrics_registry.collect("otp", otp_store.stats)
+metrics_registry.collect("presence", presence_tracker.stats)
+metrics_registry.collect("rate_limit", rate_limiter.stats)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(token_details: dict = Depends(MetricsTokenBearer())):
+    return Response(content=metrics_registry.render(), media_type=CONTENT_TYPE)
+
 # Add explicit preflight handler for OPTIONS requests
 @app.options("/{rest_of_path:path}")
 async def preflight_handler(request: Request, rest_of_path: str):
@@ -50,4 +104,23 @@ async def preflight_handler(request: Request, rest_of_path: str):
     return Response(status_code=204, headers=headers)
 
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
-app.include_router(admin_router, prefix="/admin_auth", tags=["Admin Authentication"])
\ No newline at end of file
+app.include_router(admin_router, prefix="/admin_auth", tags=["Admin Authentication"])
+
+
+
+if isinstance(storage, LocalStorage):
+    # FileResponse answers Range requests itself and hands the path to the
+    # server (ASGI pathsend) when it supports it, so file bytes are never
+    # copied through a handler. Keys are content hashes, which makes the file
+    # name a strong ETag.
+    @app.get(f"/{MEDIA_PREFIX}/{{key:path}}", include_in_schema=False)
+    async def media(key: str, request: Request):
+        path = storage.path_for(f"{MEDIA_PREFIX}/{key}")
+        if not path.is_file():
+            raise HTTPException(status_code=404, detail="File not found")
+
+        headers = {"ETag": f'"{path.stem}"', "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match.strip() == "*" or headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        return FileResponse(path, headers=headers)
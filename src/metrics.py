@@ -0,0 +1,186 @@
+import os
+import time
+from bisect import bisect_left
+from typing import Callable
+
+
+# Upper bounds, in seconds and bytes; a last implicit +Inf bucket catches the rest.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED_ROUTE = "unmatched"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """
+    Fixed buckets, non-cumulative counts. ``observe`` is one C-level bisect and
+    two additions; cumulative sums are only built when the page is rendered.
+    """
+
+    __slots__ = ("buckets", "counts", "sum")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str) -> list:
+        lines = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {running}')
+        running += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {running}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {running}")
+        return lines
+
+
+class RouteStats:
+    __slots__ = ("latency", "size", "statuses", "queries", "query_seconds")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses = {}
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.query_seconds = 0.0
+
+
+class MetricsRegistry:
+    """
+    Per-worker request metrics. Everything is updated from the event loop
+    thread only, so plain ints and dicts are enough and no locks are taken;
+    with several uvicorn workers each one exposes its own counters.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.in_flight = 0
+        self.collectors = {}
+
+    def record(self, method: str, route: str, status_code: int, seconds: float, size: int):
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        stats.latency.observe(seconds)
+        stats.size.observe(size)
+        stats.statuses[status_code] = stats.statuses.get(status_code, 0) + 1
+
+    def record_queries(self, method: str, route: str, count: int, seconds: float):
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        stats.queries.observe(count)
+        stats.query_seconds += seconds
+
+    def collect(self, name: str, stats: Callable[[], dict]):
+        """Exports the numeric fields of ``stats()`` as mindmingle_<name>_<field> gauges."""
+        self.collectors[name] = stats
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served by this worker.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Requests served, by route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        routes = sorted(self.routes.items())
+        for (method, route), stats in routes:
+            for status_code, count in sorted(stats.statuses.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status_code}"}} {count}')
+
+        lines.append("# HELP http_request_duration_seconds Time from request start to the last response byte.")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route), stats in routes:
+            lines.extend(stats.latency.lines("http_request_duration_seconds", f'method="{method}",route="{route}"'))
+
+        lines.append("# HELP http_response_size_bytes Response body size.")
+        lines.append("# TYPE http_response_size_bytes histogram")
+        for (method, route), stats in routes:
+            lines.extend(stats.size.lines("http_response_size_bytes", f'method="{method}",route="{route}"'))
+
+        lines.append("# HELP http_request_sql_statements SQL statements run per request.")
+        lines.append("# TYPE http_request_sql_statements histogram")
+        for (method, route), stats in routes:
+            lines.extend(stats.queries.lines("http_request_sql_statements", f'method="{method}",route="{route}"'))
+
+        lines.append("# HELP http_request_sql_seconds_total Time spent executing SQL, by route.")
+        lines.append("# TYPE http_request_sql_seconds_total counter")
+        for (method, route), stats in routes:
+            lines.append(f'http_request_sql_seconds_total{{method="{method}",route="{route}"}} {stats.query_seconds}')
+
+        for name, stats in self.collectors.items():
+            for field, value in stats().items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                metric = f"mindmingle_{name}_{field}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+
+        lines.append(f'process_info{{pid="{os.getpid()}"}} 1')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task or body buffering). The
+    route label is the matched path template FastAPI leaves in
+    ``scope["route"]``, so ``/auth/blog/{id}`` stays one series no matter how
+    many ids are requested.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+        sized = False
+
+        async def send_wrapper(message):
+            nonlocal status_code, size, sized
+            message_type = message["type"]
+            if message_type == "http.response.start":
+                status_code = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name == b"content-length":
+                        size = int(value)
+                        sized = True
+                        break
+            elif message_type == "http.response.body" and not sized:
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight -= 1
+            route = scope.get("route")
+            registry.record(
+                scope["method"],
+                route.path if route is not None else UNMATCHED_ROUTE,
+                status_code,
+                time.perf_counter() - started,
+                size
+            )
+
+
+metrics_registry = MetricsRegistry()
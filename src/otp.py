@@ -0,0 +1,236 @@
+import asyncio
+import hmac
+import logging
+import time
+from datetime import timedelta
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from src.config import Config
+from src.db.models import OTPVerification
+from src.utils import ist_now
+
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of OTPStore.verify
+VERIFIED = "verified"
+MISSING = "missing"
+EXPIRED = "expired"
+MISMATCH = "mismatch"
+LOCKED = "locked"
+
+
+class OTPStore:
+    """
+    One pending code per email. ``issue`` replaces any earlier code, resets
+    the attempt counter and restarts the TTL; ``reissue`` does the same but
+    only for an email that already has an entry. ``verify`` consumes the
+    code on success and counts failures; after ``max_attempts`` the entry is
+    locked until a new code is issued. Expired entries are kept for
+    ``retain_seconds`` so "resend" still works, then swept.
+    """
+
+    def __init__(self, ttl: float, max_attempts: int, retain_seconds: float, sweep_interval: float):
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.retain_seconds = retain_seconds
+        self.sweep_interval = sweep_interval
+        self.swept = 0
+        self._task = None
+
+    async def issue(self, email: str, code: str, session):
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def reissue(self, email: str, code: str, session) -> bool:
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def verify(self, email: str, code: str, session) -> str:
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def sweep(self, session_factory) -> int:
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def _run(self, session_factory):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.swept += await self.sweep(session_factory)
+            except Exception as e:
+                logger.error(f"Failed to sweep expired OTPs: {e}")
+
+    def start(self, session_factory):
+        self._task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"swept": self.swept}
+
+
+class MemoryOTPStore(OTPStore):
+    """Entries live in this process only; use it for single-worker deployments."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # email -> [code, expires_at, attempts]
+        self._entries = {}
+
+    async def issue(self, email: str, code: str, session):
+        self._entries[email] = [code, time.time() + self.ttl, 0]
+
+    async def reissue(self, email: str, code: str, session) -> bool:
+        if email not in self._entries:
+            return False
+        await self.issue(email, code, session)
+        return True
+
+    async def verify(self, email: str, code: str, session) -> str:
+        entry = self._entries.get(email)
+        if entry is None:
+            return MISSING
+        expected, expires_at, attempts = entry
+        if attempts >= self.max_attempts:
+            return LOCKED
+        if expires_at < time.time():
+            return EXPIRED
+        if not hmac.compare_digest(expected, code):
+            entry[2] += 1
+            return MISMATCH
+        del self._entries[email]
+        return VERIFIED
+
+    async def sweep(self, session_factory) -> int:
+        cutoff = time.time() - self.retain_seconds
+        expired = [email for email, (_, expires_at, _) in self._entries.items() if expires_at < cutoff]
+        for email in expired:
+            del self._entries[email]
+        return len(expired)
+
+    def stats(self) -> dict:
+        return {"swept": self.swept, "pending": len(self._entries)}
+
+
+class DatabaseOTPStore(OTPStore):
+    """
+    Entries are otp_verification rows, one per email (unique index), so any
+    worker can verify a code another one issued. Every operation is a single
+    indexed statement on the email.
+    """
+
+    def __init__(self, *args, sweep_batch: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sweep_batch = sweep_batch
+
+    async def issue(self, email: str, code: str, session):
+        now = ist_now()
+        values = {
+            "email": email,
+            "otp": code,
+            "attempts": 0,
+            "expires_at": now + timedelta(seconds=self.ttl),
+            "created_at": now,
+            "updated_at": now,
+        }
+        dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+        statement = dialect.insert(OTPVerification).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[OTPVerification.email],
+            set_={key: statement.excluded[key] for key in ("otp", "attempts", "expires_at", "created_at", "updated_at")}
+        )
+        await session.execute(statement)
+        await session.commit()
+
+    async def reissue(self, email: str, code: str, session) -> bool:
+        now = ist_now()
+        result = await session.execute(
+            update(OTPVerification)
+            .where(OTPVerification.email == email)
+            .values(
+                otp=code,
+                attempts=0,
+                expires_at=now + timedelta(seconds=self.ttl),
+                created_at=now,
+                updated_at=now
+            )
+        )
+        await session.commit()
+        return result.rowcount > 0
+
+    async def verify(self, email: str, code: str, session) -> str:
+        # Spend an attempt and fetch the code in one statement, so concurrent
+        # guesses cannot all pass the limit check before any is counted.
+        result = await session.execute(
+            update(OTPVerification)
+            .where(
+                OTPVerification.email == email,
+                OTPVerification.attempts < self.max_attempts,
+                OTPVerification.expires_at >= ist_now()
+            )
+            .values(attempts=OTPVerification.attempts + 1)
+            .returning(OTPVerification.otp)
+        )
+        row = result.first()
+        await session.commit()
+
+        if row is None:
+            result = await session.execute(
+                select(OTPVerification.attempts).where(OTPVerification.email == email)
+            )
+            attempts = result.scalar()
+            if attempts is None:
+                return MISSING
+            return LOCKED if attempts >= self.max_attempts else EXPIRED
+
+        if not hmac.compare_digest(row.otp or "", code):
+            return MISMATCH
+
+        # Only the request that deletes the row wins a concurrent race.
+        result = await session.execute(
+            delete(OTPVerification).where(OTPVerification.email == email, OTPVerification.otp == code)
+        )
+        await session.commit()
+        return VERIFIED if result.rowcount else MISSING
+
+    async def sweep(self, session_factory) -> int:
+        # Short batches keep each transaction and its locks small.
+        cutoff = ist_now() - timedelta(seconds=self.retain_seconds)
+        swept = 0
+        while True:
+            async with session_factory() as session:
+                batch = (
+                    select(OTPVerification.otp_verification_uid)
+                    .where(OTPVerification.expires_at < cutoff)
+                    .limit(self.sweep_batch)
+                    .scalar_subquery()
+                )
+                result = await session.execute(
+                    delete(OTPVerification).where(OTPVerification.otp_verification_uid.in_(batch))
+                )
+                await session.commit()
+            swept += result.rowcount
+            if result.rowcount < self.sweep_batch:
+                return swept
+
+
+def build_otp_store() -> OTPStore:
+    options = {
+        "ttl": Config.OTP_TTL_SECONDS,
+        "max_attempts": Config.OTP_MAX_ATTEMPTS,
+        "retain_seconds": Config.OTP_RETAIN_SECONDS,
+        "sweep_interval": Config.OTP_SWEEP_INTERVAL_SECONDS,
+    }
+    if Config.OTP_BACKEND == "memory":
+        return MemoryOTPStore(**options)
+    if Config.OTP_BACKEND != "database":
+        raise ValueError(f"Unknown OTP_BACKEND {Config.OTP_BACKEND!r}; expected 'database' or 'memory'")
+    return DatabaseOTPStore(**options, sweep_batch=Config.OTP_SWEEP_BATCH)
+
+
+otp_store = build_otp_store()
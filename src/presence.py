@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import uuid
+from sqlalchemy import Boolean, bindparam, column, or_, update, values
+from src.config import Config
+from src.db.models import usertable
+from src.db.types import GUID, Timestamp
+from src.utils import ist_now
+
+
+logger = logging.getLogger(__name__)
+
+# Core rather than ORM bulk UPDATE, which fails the whole batch when one user
+# has been deleted meanwhile. The last_seen guard keeps an older event flushed
+# late by another worker from undoing a newer one.
+USERS = usertable.__table__
+PRESENCE_UPDATE = (
+    update(USERS)
+    .where(
+        USERS.c.user_id == bindparam("b_user_id"),
+        or_(USERS.c.last_seen.is_(None), USERS.c.last_seen <= bindparam("b_last_seen"))
+    )
+    .values(login_status=bindparam("b_login_status"), last_seen=bindparam("b_last_seen"))
+)
+
+
+def presence_update_from(batch: list):
+    """
+    The same update as one UPDATE ... FROM (VALUES ...) for a batch of
+    (user_id, login_status, last_seen). asyncpg reports no rowcount for
+    executemany, so PostgreSQL uses this instead.
+    """
+    presence = values(
+        column("user_id", GUID),
+        column("login_status", Boolean),
+        column("last_seen", Timestamp),
+        name="presence"
+    ).data(batch)
+    return (
+        update(USERS)
+        .where(
+            USERS.c.user_id == presence.c.user_id,
+            or_(USERS.c.last_seen.is_(None), USERS.c.last_seen <= presence.c.last_seen)
+        )
+        .values(login_status=presence.c.login_status, last_seen=presence.c.last_seen)
+    )
+
+
+class PresenceTracker:
+    """
+    Keeps login status and last-seen time off the request path. Logins,
+    logouts and authenticated requests only record the change in memory;
+    a background task writes everything recorded since the last run to
+    usertable every ``flush_interval`` seconds as one batched UPDATE by
+    primary key, so a user making a hundred requests costs one row write
+    per interval. Other workers see a change once it is flushed; this
+    worker sees it immediately through ``overlay``.
+
+    Every event carries its status and time, and a flush only overwrites a
+    row whose last_seen is older, so with several workers the latest event
+    wins rather than the latest flush. An authenticated request counts as
+    being logged in.
+    """
+
+    def __init__(self, flush_interval: float, flush_batch: int):
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.recorded = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+        # user_id -> (login_status, last_seen)
+        self._pending = {}
+        self._task = None
+
+    def _record(self, user_id, login_status: bool):
+        try:
+            key = user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+        except ValueError:
+            return
+        self._pending[key] = (login_status, ist_now())
+        self.recorded += 1
+
+    def seen(self, user_id):
+        self._record(user_id, True)
+
+    def logged_in(self, user_id):
+        self._record(user_id, True)
+
+    def logged_out(self, user_id):
+        self._record(user_id, False)
+
+    def overlay(self, user_id, login_status: bool, last_seen):
+        """Returns (login_status, last_seen) with this worker's unflushed changes applied."""
+        entry = self._pending.get(user_id)
+        if entry is None or (last_seen is not None and last_seen > entry[1]):
+            return login_status, last_seen
+        return entry
+
+    async def flush(self, session_factory) -> int:
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        rows = [(user_id, login_status, last_seen) for user_id, (login_status, last_seen) in pending.items()]
+        written = 0
+        try:
+            async with session_factory() as session:
+                postgres = session.get_bind().dialect.name == "postgresql"
+                for start in range(0, len(rows), self.flush_batch):
+                    batch = rows[start:start + self.flush_batch]
+                    if postgres:
+                        result = await session.execute(presence_update_from(batch))
+                    else:
+                        result = await session.execute(PRESENCE_UPDATE, [
+                            {"b_user_id": user_id, "b_login_status": login_status, "b_last_seen": last_seen}
+                            for user_id, login_status, last_seen in batch
+                        ])
+                    # Rows skipped by the last_seen guard, or whose user is
+                    # gone, are not counted.
+                    written += result.rowcount
+                await session.commit()
+        except Exception:
+            # Put the batch back unless something newer was recorded meanwhile.
+            for user_id, entry in pending.items():
+                self._pending.setdefault(user_id, entry)
+            raise
+        self.flushes += 1
+        self.flushed_rows += written
+        return written
+
+    async def _run(self, session_factory):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush(session_factory)
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Failed to flush presence: {e}")
+
+    def start(self, session_factory):
+        self._task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self, session_factory):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush(session_factory)
+        except Exception as e:
+            logger.error(f"Failed to flush presence at shutdown: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+presence_tracker = PresenceTracker(
+    flush_interval=Config.PRESENCE_FLUSH_SECONDS,
+    flush_batch=Config.PRESENCE_FLUSH_BATCH
+)
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import random
+import re
+import time
+import uuid
+from pathlib import Path
+from fastapi import HTTPException, status
+from src.config import Config
+from src.utils import decode_token
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+CAPTURE_SUFFIX = ".speedscope.json"
+CAPTURE_ID_PATTERN = re.compile(r"^[0-9]{13}-[0-9a-f]{8}$")
+
+
+class CaptureStore:
+    """
+    Bounded ring buffer of profiles on disk. Capture ids start with a
+    millisecond timestamp, so sorting names gives oldest first and the oldest
+    are dropped once there are more than ``max_captures``.
+    """
+
+    def __init__(self, directory: Path, max_captures: int):
+        self.directory = Path(directory)
+        self.max_captures = max_captures
+
+    def new_id(self) -> str:
+        return f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+
+    def save(self, capture_id: str, method: str, route: str, body: str):
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_")[:60]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{capture_id}.{method}.{slug}{CAPTURE_SUFFIX}").write_text(body)
+
+        captures = sorted(self.directory.glob(f"*{CAPTURE_SUFFIX}"))
+        for stale in captures[:max(len(captures) - self.max_captures, 0)]:
+            stale.unlink(missing_ok=True)
+
+    def list(self) -> list:
+        if not self.directory.is_dir():
+            return []
+        captures = []
+        for path in sorted(self.directory.glob(f"*{CAPTURE_SUFFIX}"), reverse=True):
+            capture_id, method, route = path.name.removesuffix(CAPTURE_SUFFIX).split(".", 2)
+            captures.append({
+                "capture_id": capture_id,
+                "method": method,
+                "route": route,
+                "created_at": int(capture_id.split("-", 1)[0]) / 1000,
+                "size": path.stat().st_size,
+            })
+        return captures
+
+    def path_for(self, capture_id: str) -> Path:
+        if CAPTURE_ID_PATTERN.match(capture_id):
+            for path in self.directory.glob(f"{capture_id}.*{CAPTURE_SUFFIX}"):
+                return path
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Capture not found")
+
+
+class ProfilerMiddleware:
+    """
+    Runs pyinstrument for a single request when an admin sends
+    ``X-Profile: 1`` or when the random ``sample_rate`` hits. The profiler
+    samples only the request's own task (async_mode="enabled"), and only one
+    capture runs at a time per worker. Other requests pass through untouched.
+    The capture id is returned in the X-Profile-Id response header.
+    """
+
+    def __init__(self, app, store: CaptureStore, sample_rate: float = 0.0, interval: float = 0.001):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.active = False
+        self._tasks = set()
+        try:
+            from pyinstrument import Profiler
+            self.profiler_class = Profiler
+        except ImportError:
+            logger.warning("pyinstrument is not installed; request profiling is disabled")
+            self.profiler_class = None
+
+    def wants_profile(self, scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER) not in (b"1", b"true"):
+            return False
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        if not authorization.lower().startswith("bearer "):
+            return False
+        token_data = decode_token(authorization[7:].strip())
+        return bool(token_data) and token_data.get("user", {}).get("admin_role") == "admin"
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or self.profiler_class is None
+            or self.active
+            or not self.wants_profile(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        self.active = True
+        capture_id = self.store.new_id()
+        profiler = self.profiler_class(interval=self.interval, async_mode="enabled")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", capture_id.encode())
+                ]
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            self.active = False
+            # Rendering and writing happen after the response has gone out.
+            task = asyncio.create_task(self._save(profiler, scope, capture_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _save(self, profiler, scope, capture_id: str):
+        from pyinstrument.renderers import SpeedscopeRenderer
+
+        route = scope.get("route")
+        try:
+            body = await asyncio.to_thread(profiler.output, renderer=SpeedscopeRenderer())
+            await asyncio.to_thread(
+                self.store.save, capture_id, scope["method"], route.path if route else scope["path"], body
+            )
+        except Exception as e:
+            logger.error(f"Failed to save request profile {capture_id}: {e}")
+
+
+capture_store = CaptureStore(Path(Config.PROFILE_DIR), Config.PROFILE_MAX_CAPTURES)
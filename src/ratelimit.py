@@ -0,0 +1,191 @@
+import json
+import math
+import time
+from src.config import Config
+from src.utils import decode_token
+
+
+class Limit:
+    """``count`` requests per ``seconds``, refilled continuously, bursting up to ``count``."""
+
+    __slots__ = ("name", "capacity", "rate")
+
+    def __init__(self, name: str, spec: str):
+        count, seconds = spec.split("/")
+        self.name = name
+        self.capacity = float(count)
+        self.rate = float(count) / float(seconds)
+
+    @property
+    def idle_seconds(self) -> float:
+        # A bucket untouched this long has refilled completely, so dropping
+        # it changes nothing.
+        return self.capacity / self.rate
+
+
+class TokenBuckets:
+    """
+    Token buckets keyed by (limit, subject), spread over ``shards`` plain
+    dicts. Everything runs on the event loop thread and no call awaits, so a
+    check-and-take is atomic without locks. Each shard drops its idle buckets
+    at most once per ``sweep_interval``, so a sweep only walks 1/shards of
+    the keys.
+    """
+
+    def __init__(self, shards: int, sweep_interval: float):
+        self.shards = [{} for _ in range(shards)]
+        self.swept_at = [time.monotonic()] * shards
+        self.sweep_interval = sweep_interval
+        self.evicted = 0
+
+    def take(self, limit: Limit, subject: str, now: float) -> float:
+        """Takes one token; returns 0 on success, else seconds until one is available."""
+        key = (limit.name, subject)
+        index = hash(key) % len(self.shards)
+        shard = self.shards[index]
+        if now - self.swept_at[index] > self.sweep_interval:
+            self._sweep(index, now)
+
+        bucket = shard.get(key)
+        if bucket is None:
+            shard[key] = [limit.capacity - 1, now, limit]
+            return 0.0
+
+        tokens = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / limit.rate
+
+    def _sweep(self, index: int, now: float):
+        shard = self.shards[index]
+        idle = [key for key, (_, updated_at, limit) in shard.items() if now - updated_at > limit.idle_seconds]
+        for key in idle:
+            del shard[key]
+        self.evicted += len(idle)
+        self.swept_at[index] = now
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+
+class RateLimiter:
+    """
+    Throttles the login, OTP and write endpoints before they reach bcrypt,
+    SMTP or the database. Every request to a limited route spends a token
+    from its client IP's bucket and, when it carries a valid access token,
+    from its user's bucket; either one running dry means 429.
+    """
+
+    def __init__(self, routes: list, buckets: TokenBuckets, enabled: bool = True):
+        # [(method, path prefix, Limit)], first match wins
+        self.routes = routes
+        self.buckets = buckets
+        self.enabled = enabled
+        self.allowed = 0
+        self.limited = 0
+
+    def limit_for(self, method: str, path: str):
+        for route_method, prefix, limit in self.routes:
+            if method == route_method and path.startswith(prefix):
+                return limit
+        return None
+
+    def check(self, scope) -> float:
+        """Returns 0 when the request may proceed, else seconds to wait."""
+        limit = self.limit_for(scope["method"], scope["path"])
+        if limit is None:
+            return 0.0
+
+        now = time.monotonic()
+        client = scope.get("client")
+        retry_after = self.buckets.take(limit, f"ip:{client[0] if client else '-'}", now)
+
+        if not retry_after:
+            user_id = self._user_id(scope)
+            if user_id:
+                retry_after = self.buckets.take(limit, f"user:{user_id}", now)
+
+        if retry_after:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return retry_after
+
+    def _user_id(self, scope):
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                if authorization.lower().startswith("bearer "):
+                    token_data = decode_token(authorization[7:].strip())
+                    if token_data:
+                        return token_data.get("user", {}).get("user_id")
+                return None
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "buckets": len(self.buckets),
+            "evicted": self.buckets.evicted,
+        }
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI front for a RateLimiter; it runs before routing, so limits
+    match on method and path prefix. The client IP is scope["client"], so
+    behind a proxy run uvicorn with --proxy-headers.
+    """
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = self.limiter.check(scope)
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": "Too many requests. Please try again later."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def rate_limited_routes() -> list:
+    login = Limit("login", Config.RATE_LIMIT_LOGIN)
+    otp = Limit("otp", Config.RATE_LIMIT_OTP)
+    write = Limit("write", Config.RATE_LIMIT_WRITE)
+    return [
+        ("POST", "/auth/login", login),
+        ("POST", "/auth/emailvarfication", otp),
+        ("POST", "/auth/ResendOTP", otp),
+        ("POST", "/auth/OTPverification", otp),
+        ("POST", "/auth/like/", write),
+        ("POST", "/auth/dislike/", write),
+        ("POST", "/auth/comment/", write),
+    ]
+
+
+rate_limiter = RateLimiter(
+    rate_limited_routes(),
+    TokenBuckets(shards=Config.RATE_LIMIT_SHARDS, sweep_interval=Config.RATE_LIMIT_SWEEP_SECONDS),
+    enabled=Config.RATE_LIMIT_ENABLED
+)
@@ -0,0 +1,322 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlencode
+from fastapi import HTTPException, status
+from src.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+# Keys are derived from the content, so an object never changes once written.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class Storage:
+    """
+    Where uploaded media lives. Keys are relative, slash-separated paths such
+    as ``media/ab/abcd....jpg``; ``url_for`` turns one into the URL clients
+    fetch it from.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    def url_for(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def key_for(self, url: str) -> str:
+        return url.removeprefix(f"{self.base_url}/")
+
+    async def exists(self, key: str) -> bool:
+        return await self.size(key) is not None
+
+    async def size(self, key: str) -> Optional[int]:
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def read(self, key: str, length: Optional[int] = None) -> bytes:
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def presign_put(self, key: str, content_type: str, size: int, checksum: str, expires: int) -> dict:
+        """
+        A URL the client can PUT exactly ``size`` bytes to without going
+        through the API. ``checksum`` is the base64 SHA-256 of the body.
+        Returns {"url": ..., "headers": {...}}; every header must be sent.
+        """
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def put(self, key: str, body: bytes, content_type: str):
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def create_multipart(self, key: str, content_type: str) -> str:
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def upload_part(self, key: str, upload_id: str, part_number: int, body: bytes) -> dict:
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def complete_multipart(self, key: str, upload_id: str, parts: list):
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def abort_multipart(self, key: str, upload_id: str):
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def move(self, source_key: str, key: str):
+        raise NotImplementedError("Please Override this method in child classes")
+
+    async def delete(self, key: str):
+        raise NotImplementedError("Please Override this method in child classes")
+
+
+class S3Storage(Storage):
+
+    def __init__(self, client, bucket: str, base_url: str = None):
+        super().__init__(base_url or f"https://{bucket}.s3.amazonaws.com")
+        self.client = client
+        self.bucket = bucket
+
+    async def size(self, key: str) -> Optional[int]:
+        from botocore.exceptions import ClientError
+
+        try:
+            response = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+            return response["ContentLength"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def read(self, key: str, length: Optional[int] = None) -> bytes:
+        options = {"Range": f"bytes=0-{length - 1}"} if length else {}
+        response = await asyncio.to_thread(self.client.get_object, Bucket=self.bucket, Key=key, **options)
+        return await asyncio.to_thread(response["Body"].read)
+
+    async def presign_put(self, key: str, content_type: str, size: int, checksum: str, expires: int) -> dict:
+        # S3 rejects the PUT unless length and SHA-256 match what was signed,
+        # so the object under a content key really has that content.
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(size),
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+            "x-amz-checksum-sha256": checksum,
+        }
+        url = await asyncio.to_thread(
+            self.client.generate_presigned_url,
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": size,
+                "CacheControl": IMMUTABLE_CACHE_CONTROL,
+                "ChecksumSHA256": checksum,
+            },
+            ExpiresIn=expires
+        )
+        return {"url": url, "headers": headers}
+
+    async def put(self, key: str, body: bytes, content_type: str):
+        await asyncio.to_thread(
+            self.client.put_object,
+            Bucket=self.bucket,
+            Key=key,
+            Body=body,
+            ContentType=content_type,
+            CacheControl=IMMUTABLE_CACHE_CONTROL
+        )
+
+    async def create_multipart(self, key: str, content_type: str) -> str:
+        response = await asyncio.to_thread(
+            self.client.create_multipart_upload,
+            Bucket=self.bucket,
+            Key=key,
+            ContentType=content_type,
+            CacheControl=IMMUTABLE_CACHE_CONTROL
+        )
+        return response["UploadId"]
+
+    async def upload_part(self, key: str, upload_id: str, part_number: int, body: bytes) -> dict:
+        response = await asyncio.to_thread(
+            self.client.upload_part,
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body
+        )
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    async def complete_multipart(self, key: str, upload_id: str, parts: list):
+        await asyncio.to_thread(
+            self.client.complete_multipart_upload,
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts}
+        )
+
+    async def abort_multipart(self, key: str, upload_id: str):
+        await asyncio.to_thread(
+            self.client.abort_multipart_upload,
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id
+        )
+
+    async def move(self, source_key: str, key: str):
+        # S3 has no rename; copy server-side, then drop the source.
+        try:
+            await asyncio.to_thread(
+                self.client.copy_object,
+                Bucket=self.bucket,
+                Key=key,
+                CopySource={"Bucket": self.bucket, "Key": source_key},
+                MetadataDirective="COPY"
+            )
+        finally:
+            try:
+                await self.delete(source_key)
+            except Exception as e:
+                logger.warning(f"Failed to delete {source_key} after copying it to {key}: {e}")
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+
+class LocalStorage(Storage):
+    """
+    Keeps objects as plain files under ``root``. Writes go to a temporary file
+    that is renamed into place, so a reader never sees a partial object and
+    two uploads of the same content can race safely.
+    """
+
+    def __init__(self, root: Path, signing_key: str, base_url: str = "", upload_url: str = "/auth/direct_upload"):
+        super().__init__(base_url)
+        self.signing_key = signing_key.encode()
+        self.upload_url = upload_url
+        self.root = Path(root).resolve()
+        self.multipart_dir = self.root / ".multipart"
+        self.multipart_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root) or path.is_relative_to(self.multipart_dir):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        return path
+
+    async def size(self, key: str) -> Optional[int]:
+        path = self.path_for(key)
+        return path.stat().st_size if path.is_file() else None
+
+    async def read(self, key: str, length: Optional[int] = None) -> bytes:
+        def read_file():
+            with open(self.path_for(key), "rb") as source:
+                return source.read(length) if length else source.read()
+        return await asyncio.to_thread(read_file)
+
+    async def presign_put(self, key: str, content_type: str, size: int, checksum: str, expires: int) -> dict:
+        expires_at = int(time.time()) + expires
+        signature = self.sign(key, content_type, size, expires_at)
+        query = urlencode({"size": size, "expires": expires_at, "signature": signature})
+        return {"url": f"{self.upload_url}/{key}?{query}", "headers": {"Content-Type": content_type}}
+
+    def sign(self, key: str, content_type: str, size: int, expires_at: int) -> str:
+        message = f"{key}|{content_type}|{size}|{expires_at}".encode()
+        return hmac.new(self.signing_key, message, hashlib.sha256).hexdigest()
+
+    async def receive(self, key: str, content_type: str, size: int, expires_at: int, signature: str, digest: str, chunks):
+        """
+        Accepts a PUT issued by ``presign_put``. The body is streamed to a
+        staging file and only moved to ``key`` when its length and SHA-256
+        match what was signed.
+        """
+        expected = self.sign(key, content_type, size, expires_at)
+        if not hmac.compare_digest(expected, signature) or expires_at < time.time():
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired upload URL")
+
+        upload_id = await self.create_multipart(key, content_type)
+        received = 0
+        sha256 = hashlib.sha256()
+        try:
+            async for chunk in chunks:
+                received += len(chunk)
+                if received > size:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload is larger than signed")
+                sha256.update(chunk)
+                await self.upload_part(key, upload_id, 1, chunk)
+
+            if received != size or sha256.hexdigest() != digest:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload does not match its checksum")
+            await self.complete_multipart(key, upload_id, [])
+        except BaseException:
+            await self.abort_multipart(key, upload_id)
+            raise
+
+    async def put(self, key: str, body: bytes, content_type: str):
+        await asyncio.to_thread(self._write, self.path_for(key), body)
+
+    async def create_multipart(self, key: str, content_type: str) -> str:
+        upload_id = uuid.uuid4().hex
+        (self.multipart_dir / upload_id).touch()
+        return upload_id
+
+    async def upload_part(self, key: str, upload_id: str, part_number: int, body: bytes) -> dict:
+        # Parts arrive in order from a single writer, so appending is enough.
+        await asyncio.to_thread(self._append, self.multipart_dir / upload_id, body)
+        return {"PartNumber": part_number}
+
+    async def complete_multipart(self, key: str, upload_id: str, parts: list):
+        await asyncio.to_thread(self._replace, self.multipart_dir / upload_id, self.path_for(key))
+
+    async def abort_multipart(self, key: str, upload_id: str):
+        (self.multipart_dir / upload_id).unlink(missing_ok=True)
+
+    async def move(self, source_key: str, key: str):
+        await asyncio.to_thread(self._replace, self.path_for(source_key), self.path_for(key))
+
+    async def delete(self, key: str):
+        self.path_for(key).unlink(missing_ok=True)
+
+    def _write(self, path: Path, body: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        with open(temporary, "wb") as output:
+            output.write(body)
+        os.replace(temporary, path)
+
+    def _append(self, path: Path, body: bytes):
+        with open(path, "ab") as output:
+            output.write(body)
+
+    def _replace(self, source: Path, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, path)
+
+
+def build_storage() -> Storage:
+    if Config.STORAGE_BACKEND == "local":
+        return LocalStorage(Path(Config.UPLOAD_DIR), Config.JWT_SECRET, Config.MEDIA_BASE_URL or "")
+
+    if Config.STORAGE_BACKEND != "s3":
+        raise ValueError(f"Unknown STORAGE_BACKEND {Config.STORAGE_BACKEND!r}; expected 's3' or 'local'")
+
+    import boto3
+    from botocore.config import Config as BotoConfig
+
+    client = boto3.client(
+        's3',
+        aws_access_key_id=Config.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=Config.AWS_SECRET_ACCESS_KEY,
+        region_name=Config.AWS_REGION,
+        # Presigned PUTs need SigV4 to sign the checksum and length headers.
+        config=BotoConfig(signature_version="s3v4")
+    )
+    return S3Storage(client, Config.S3_BUCKET_NAME, Config.MEDIA_BASE_URL)
+
+
+storage = build_storage()
@@ -0,0 +1,238 @@
+import base64
+import hashlib
+import logging
+import re
+import uuid
+from botocore.exceptions import ClientError
+from fastapi import UploadFile, HTTPException, status
+from src.config import Config
+from src.storage import Storage, storage
+
+
+logger = logging.getLogger(__name__)
+
+# S3 rejects multipart parts smaller than this (except the last one).
+S3_MIN_PART_BYTES = 5 * 1024 * 1024
+
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+}
+IMAGE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+}
+MEDIA_PREFIX = "media"
+CONTENT_KEY_PATTERN = re.compile(rf"^{MEDIA_PREFIX}/([0-9a-f]{{2}})/(\1[0-9a-f]{{62}})(\.jpg|\.png)$")
+# Multipart uploads land here until their hash is known; expire the prefix
+# with a lifecycle rule to sweep anything a crash leaves behind.
+STAGING_PREFIX = "uploads/staging"
+
+
+def sniff_image_type(head: bytes) -> str:
+    for signature, content_type in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return content_type
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid file type. Please upload a .jpg, .jpeg, or .png image."
+    )
+
+
+def content_key(digest: str, content_type: str) -> str:
+    return f"{MEDIA_PREFIX}/{digest[:2]}/{digest}{IMAGE_EXTENSIONS[content_type]}"
+
+
+def too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File is too large. The maximum size is {max_bytes // (1024 * 1024)} MB."
+    )
+
+
+class UploadPipeline:
+    """
+    Streams an UploadFile to storage in fixed-size chunks and stores it under
+    the SHA-256 of its content. The first chunk is sniffed for a JPEG/PNG
+    signature, the running size is checked against ``max_bytes`` as it grows,
+    and anything larger than one part switches to a multipart upload, so at
+    most one part is held in memory per upload. Content that is already
+    stored is never written twice.
+    """
+
+    def __init__(self, storage: Storage, max_bytes: int, part_bytes: int, chunk_bytes: int):
+        self.storage = storage
+        self.max_bytes = max_bytes
+        self.part_bytes = max(part_bytes, S3_MIN_PART_BYTES)
+        self.chunk_bytes = chunk_bytes
+        self.uploaded = 0
+        self.deduplicated = 0
+
+    async def upload(self, file: UploadFile) -> str:
+        if file.size is not None and file.size > self.max_bytes:
+            raise too_large(self.max_bytes)
+
+        await file.seek(0)
+        first_chunk = await file.read(self.chunk_bytes)
+        content_type = sniff_image_type(first_chunk)
+
+        digest = hashlib.sha256(first_chunk)
+        buffer = bytearray(first_chunk)
+        total = len(first_chunk)
+        staging_key = f"{STAGING_PREFIX}/{uuid.uuid4().hex}"
+        upload_id = None
+        parts = []
+
+        try:
+            while True:
+                chunk = await file.read(self.chunk_bytes)
+                if not chunk:
+                    break
+                total += len(chunk)
+                if total > self.max_bytes:
+                    raise too_large(self.max_bytes)
+                digest.update(chunk)
+                buffer += chunk
+
+                if len(buffer) >= self.part_bytes:
+                    if upload_id is None:
+                        upload_id = await self.storage.create_multipart(staging_key, content_type)
+                    parts.append(await self.storage.upload_part(staging_key, upload_id, len(parts) + 1, bytes(buffer)))
+                    buffer.clear()
+
+            key = content_key(digest.hexdigest(), content_type)
+
+            if await self.storage.exists(key):
+                self.deduplicated += 1
+                if upload_id is not None:
+                    await self._abort_multipart(staging_key, upload_id)
+                return key
+
+            if upload_id is None:
+                await self.storage.put(key, bytes(buffer), content_type)
+                self.uploaded += 1
+                return key
+
+            if buffer:
+                parts.append(await self.storage.upload_part(staging_key, upload_id, len(parts) + 1, bytes(buffer)))
+            await self.storage.complete_multipart(staging_key, upload_id, parts)
+            upload_id = None
+            # The hash is only known once the last part is sent, so multipart
+            # uploads are moved to their content key afterwards.
+            await self.storage.move(staging_key, key)
+            self.uploaded += 1
+            return key
+
+        except BaseException:
+            if upload_id is not None:
+                await self._abort_multipart(staging_key, upload_id)
+            raise
+
+    def stats(self) -> dict:
+        return {"uploaded": self.uploaded, "deduplicated": self.deduplicated}
+
+    async def _abort_multipart(self, key: str, upload_id: str):
+        try:
+            await self.storage.abort_multipart(key, upload_id)
+        except Exception as e:
+            logger.warning(f"Failed to abort multipart upload {upload_id} for {key}: {e}")
+
+
+upload_pipeline = UploadPipeline(
+    storage,
+    max_bytes=Config.MAX_UPLOAD_BYTES,
+    part_bytes=Config.UPLOAD_PART_BYTES,
+    chunk_bytes=Config.UPLOAD_CHUNK_BYTES
+)
+
+
+async def upload_media(file: UploadFile) -> str:
+    """Stores an uploaded image through the pipeline and returns its public URL."""
+    try:
+        return storage.url_for(await upload_pipeline.upload(file))
+
+    except ClientError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload file '{file.filename}' to S3: {e.response['Error']['Message']}"
+        )
+    except OSError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to store file '{file.filename}': {e}"
+        )
+
+
+class DirectUploads:
+    """
+    Lets clients PUT images straight to storage so the bytes never pass
+    through an API worker. ``issue`` hands out a short-lived URL for the
+    content key the client's SHA-256 maps to; ``confirm`` checks what
+    actually landed there before the key is linked to a blog or profile.
+    """
+
+    def __init__(self, storage: Storage, max_bytes: int, expires: int):
+        self.storage = storage
+        self.max_bytes = max_bytes
+        self.expires = expires
+
+    async def issue(self, content_type: str, size: int, sha256: str) -> dict:
+        if content_type not in IMAGE_EXTENSIONS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid file type. Please upload a .jpg, .jpeg, or .png image."
+            )
+        if size <= 0 or size > self.max_bytes:
+            raise too_large(self.max_bytes)
+        sha256 = sha256.lower()
+        if not re.fullmatch(r"[0-9a-f]{64}", sha256):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid sha256")
+
+        key = content_key(sha256, content_type)
+        response = {"key": key, "url": self.storage.url_for(key), "upload": None}
+        if await self.storage.exists(key):
+            # Already stored; the client can link the key straight away.
+            return response
+
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        presigned = await self.storage.presign_put(key, content_type, size, checksum, self.expires)
+        response["upload"] = {"method": "PUT", "expires_in": self.expires, **presigned}
+        return response
+
+    async def confirm(self, key: str) -> str:
+        match = CONTENT_KEY_PATTERN.match(key or "")
+        if not match:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid upload key")
+
+        size = await self.storage.size(key)
+        if size is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+
+        if size > self.max_bytes:
+            await self.storage.delete(key)
+            raise too_large(self.max_bytes)
+
+        head = await self.storage.read(key, 16)
+        try:
+            content_type = sniff_image_type(head)
+        except HTTPException:
+            await self.storage.delete(key)
+            raise
+        if IMAGE_EXTENSIONS[content_type] != match.group(3):
+            await self.storage.delete(key)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload does not match its file type")
+
+        return self.storage.url_for(key)
+
+    def digest_for(self, key: str) -> str:
+        match = CONTENT_KEY_PATTERN.match(key)
+        if not match:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid upload key")
+        return match.group(2)
+
+
+direct_uploads = DirectUploads(
+    storage,
+    max_bytes=Config.MAX_UPLOAD_BYTES,
+    expires=Config.DIRECT_UPLOAD_EXPIRES_SECONDS
+)
@@ -2,6 +2,7 @@ from fastapi.security import HTTPBearer
 from fastapi import Request, status
 from fastapi.security.http import HTTPAuthorizationCredentials
 from src.utils import decode_token
+from src.presence import presence_tracker
 from fastapi.exceptions import HTTPException
 from typing import Optional
 import jwt
@@ -18,7 +19,7 @@ class TokenBearer(HTTPBearer):
 
         token_data = decode_token(token)
 
-        if not self.token_valid(token):
+        if token_data is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid or  expired token"
@@ -27,11 +28,11 @@ class TokenBearer(HTTPBearer):
         self.verify_token_data(token_data)
         self.check_user_role(token_data)
 
-        return token_data
+        user_id = token_data["user"].get("user_id")
+        if user_id:
+            presence_tracker.seen(user_id)
 
-    def token_valid(self, token: str):
-        token_data = decode_token(token)
-        return True if token_data is not None else False
+        return token_data
 
     def verify_token_data(self, token_data):
         raise NotImplementedError(
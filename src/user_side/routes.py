@@ -1,12 +1,25 @@
-from fastapi import APIRouter, Depends, Form
+from fastapi import APIRouter, Depends, Form, Query, Request
 from src.db.database import get_session
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from .service import *
 from .dependencies import *
-from fastapi_mail import FastMail, MessageSchema
-from src.mail import mail_config
+from src.mail import mail_queue
+from src.cache import feed_cache, read_flight
+from src.images import preferred_image
+from src.storage import storage, LocalStorage
+from src.upload import direct_uploads
+from src.usernames import username_index
+from src.accounts import signup_conflict
+from src.presence import presence_tracker
+from src.otp import (
+    otp_store,
+    MISSING as OTP_MISSING,
+    MISMATCH as OTP_MISMATCH,
+    EXPIRED as OTP_EXPIRED,
+    LOCKED as OTP_LOCKED,
+)
 from src.utils import *
-from sqlalchemy import and_
+from sqlalchemy import tuple_
 from sqlalchemy.future import select
 from fastapi.encoders import jsonable_encoder
 import traceback
@@ -20,6 +33,11 @@ user_service = UserService()
 user_validation = Validation()
 access_token_bearer = AccessTokenBearer()
 REFRESH_TOKEN_EXPIRY = 2
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+FEED_COMMENT_PREVIEW = 3
+COMMENT_PAGE_SIZE = 20
+COMMENT_MAX_PAGE_SIZE = 100
 
 
 @auth_router.post("/emailvarfication", response_model=UserModel, status_code=status.HTTP_201_CREATED)
@@ -33,72 +51,47 @@ async def Emailvarfication(user_data: Emailvalidation, session: AsyncSession = D
             status_code=status.HTTP_403_FORBIDDEN, detail="Email already exists")
 
     code = random_code()
-    message = generate_verification_email(email, code)
-    fm = FastMail(mail_config)
     try:
-        await fm.send_message(message)
-        ist = pytz.timezone("Asia/Kolkata")
-        utc_time = datetime.utcnow().replace(tzinfo=pytz.utc)
-        local_time = utc_time.astimezone(ist)
-        local_time_naive = local_time.replace(tzinfo=None)
-
-        OTP = OTPVerification(
-            email=email,
-            otp=str(code),
-            created_at=local_time_naive,
-            updated_at=local_time_naive
-        )
-
-        session.add(OTP)
-        await session.commit()
-        await session.refresh(OTP)
-        return JSONResponse(
-            status_code=status.HTTP_201_CREATED,
-            content={
-                "message": "OTP has been successfully sent to your registered email address.",
-            })
+        await otp_store.issue(email, str(code), session)
 
     except Exception as e:
-        import logging
-        logging.error(f"Error sending email or saving OTP: {e}")
+        logger.error(f"Error saving OTP: {e}")
         raise HTTPException(status_code=500, detail="Failed to send email")
 
+    # Delivery happens in the background; the OTP is already saved.
+    mail_queue.enqueue(generate_verification_email(email, code))
+
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content={
+            "message": "OTP has been successfully sent to your registered email address.",
+        })
+
 
 @auth_router.post("/ResendOTP", status_code=status.HTTP_201_CREATED)
 async def Resendotp(user_data: Emailvalidation, session: AsyncSession = Depends(get_session)):
     email = user_data.email.lower()
 
-    result = await session.execute(select(OTPVerification).where(OTPVerification.email == email))
-    existing_otp = result.scalars().first()
-
-    if existing_otp is None:
-        raise HTTPException(
-            status_code=404, detail="Email not registered for verification.")
-
     code = random_code()
-    message = generate_verification_email(email, code)
 
     try:
-        fm = FastMail(mail_config)
-        await fm.send_message(message)
+        reissued = await otp_store.reissue(email, str(code), session)
 
-        ist = pytz.timezone("Asia/Kolkata")
-        utc_time = datetime.utcnow().replace(tzinfo=pytz.utc)
-        local_time = utc_time.astimezone(ist).replace(tzinfo=None)
+    except Exception as e:
+        logger.error(f"Error saving OTP: {e}")
+        raise HTTPException(status_code=500, detail="Failed to send email")
 
-        existing_otp.otp = str(code)
-        existing_otp.created_at = local_time
-        existing_otp.updated_at = local_time
+    if not reissued:
+        raise HTTPException(
+            status_code=404, detail="Email not registered for verification.")
 
-        await session.commit()
+    mail_queue.enqueue(generate_verification_email(email, code))
 
-        return JSONResponse(
-            status_code=status.HTTP_201_CREATED,
-            content={"message": "OTP has been successfully resent to your registered email address.",
-                     "email": email}
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Failed to send email")
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content={"message": "OTP has been successfully resent to your registered email address.",
+                 "email": email}
+    )
 
 
 @auth_router.post("/OTPverification", status_code=status.HTTP_201_CREATED)
@@ -111,27 +104,17 @@ async def OTPverifications(user_data: OTPverification, session: AsyncSession = D
         raise HTTPException(
             status_code=400, detail="Invalid OTP: must be a 6-digit number.")
 
-    result = await session.execute(
-        select(OTPVerification).where(
-            and_(
-                OTPVerification.email == email,
-                OTPVerification.otp == OTP
-            )
-        )
-    )
-
-    existing_otp = result.scalars().first()
+    outcome = await otp_store.verify(email, OTP, session)
 
-    if existing_otp is None:
+    if outcome in (OTP_MISSING, OTP_MISMATCH):
         raise HTTPException(status_code=404, detail="Invalid email or OTP.")
-
-    ist = pytz.timezone("Asia/Kolkata")
-    utc_time = datetime.utcnow().replace(tzinfo=pytz.utc)
-    now_ist = utc_time.astimezone(ist).replace(tzinfo=None)
-
-    if now_ist - existing_otp.created_at > timedelta(minutes=1):
+    if outcome == OTP_EXPIRED:
         raise HTTPException(
             status_code=400, detail="OTP has expired. Please request a new one.")
+    if outcome == OTP_LOCKED:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many incorrect attempts. Please request a new OTP.")
 
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -158,15 +141,9 @@ async def create_user_account(user_data: UserCreate, session: AsyncSession = Dep
         raise HTTPException(
             status_code=400, detail="Password must be at least 8 characters, contain 1 uppercase, 1 lowercase, 1 digit, and 1 special character.")
 
-    user_exists_with_email = await user_service.exist_email(email, session)
-    user_exists_with_username = await user_service.exist_username(username, session)
-
-    if user_exists_with_email:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Email already exists")
-    if user_exists_with_username:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Username already exists")
+    conflict = await signup_conflict(email, username, session)
+    if conflict:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=conflict)
     if user_data.password != user_data.confirm_password:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Passwords do not match")
@@ -181,6 +158,19 @@ async def create_user_account(user_data: UserCreate, session: AsyncSession = Dep
     )
 
 
+@auth_router.get("/username_available", response_model=dict)
+async def username_available(username: str = Query(...), session: AsyncSession = Depends(get_session)):
+    username = username.lower()
+
+    is_username = await user_validation.validate_text(username, session)
+    if not is_username:
+        raise HTTPException(
+            status_code=400, detail="Invalid username: only letters and spaces are allowed.")
+
+    available = await username_index.is_available(username, session)
+    return JSONResponse(status_code=200, content={"username": username, "available": available})
+
+
 @auth_router.post('/login')
 async def login_user(login_data: UserLoginModel, session: AsyncSession = Depends(get_session)):
     email = login_data.email
@@ -220,13 +210,14 @@ async def login_user(login_data: UserLoginModel, session: AsyncSession = Depends
 
     user = await user_service.get_user_by_email(email, session)
     if user is not None:
-        password_valid = verify_password(password, user.password)
+        password_valid, new_hash = await password_hasher.verify_and_update(password, user.password)
 
         if password_valid:
-            user.login_status = True
-            session.add(user)
-            await session.commit()
-            await session.refresh(user)
+            if new_hash:
+                user.password = new_hash
+                session.add(user)
+                await session.commit()
+            presence_tracker.logged_in(user.user_id)
 
             user_access_token = create_access_token(
                 user_data={
@@ -272,18 +263,10 @@ async def login_user(login_data: UserLoginModel, session: AsyncSession = Depends
 @auth_router.put("/user_logout/{user_id}")
 async def logout_agent(
     user_id: UUID,
-    session: AsyncSession = Depends(get_session),
     user_details: dict = Depends(access_token_bearer),
 ):
 
-    result = await session.execute(select(usertable).where(usertable.user_id == user_id))
-    user = result.scalars().first()
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    user.login_status = False
-    session.add(user)
-    await session.commit()
+    presence_tracker.logged_out(user_id)
 
     return JSONResponse(status_code=200, content={"message": "User logged out successfully."})
 
@@ -309,6 +292,7 @@ async def create_blog(
     user_id: UUID,
     description: str = Form(...),
     photo: Optional[UploadFile] = File(None),
+    photo_key: Optional[str] = Form(None),
     session: AsyncSession = Depends(get_session),
     user_details=Depends(access_token_bearer)
 ):
@@ -330,7 +314,7 @@ async def create_blog(
             "description": description,
         }
 
-        created_blog = await user_service.create_bloge(user_id, blog_data, photo, session)
+        created_blog = await user_service.create_bloge(user_id, blog_data, photo, session, photo_key)
 
         logger.info("Blog created successfully.")
         return JSONResponse(
@@ -338,6 +322,8 @@ async def create_blog(
             content={"message": "Your blog has been published successfully."}
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         tb = traceback.format_exc()
         logger.error(f"Error in create_blog: {str(e)}\n{tb}")
@@ -349,6 +335,31 @@ async def create_blog(
 
 
 
+@auth_router.post("/upload_url", response_model=dict)
+async def upload_url(upload_data: UploadUrlRequest, user_details=Depends(access_token_bearer)):
+    upload = await direct_uploads.issue(upload_data.content_type, upload_data.size, upload_data.sha256)
+    return JSONResponse(status_code=200, content=upload)
+
+
+@auth_router.put("/direct_upload/{key:path}", include_in_schema=False)
+async def direct_upload(key: str, request: Request, size: int, expires: int, signature: str):
+    # Only the local backend signs URLs that point back at the API; with S3
+    # the client PUTs to the bucket directly.
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    await storage.receive(
+        key,
+        request.headers.get("content-type", ""),
+        size,
+        expires,
+        signature,
+        direct_uploads.digest_for(key),
+        request.stream()
+    )
+    return JSONResponse(status_code=201, content={"key": key, "url": storage.url_for(key)})
+
+
 @auth_router.get("/bloge_list_profile/{user_id}", response_model=dict)
 async def bloge_list_profile(user_id: UUID,session: AsyncSession = Depends(get_session)):
     try:
@@ -363,7 +374,9 @@ async def bloge_list_profile(user_id: UUID,session: AsyncSession = Depends(get_s
         for blogs in blog:
             bloges.append({
                 "blog_uid": str(blogs.blog_uid),
-                "photo": blogs.photo,
+                "photo": preferred_image(blogs.photo, blogs.photo_variants),
+                "photo_original": blogs.photo,
+                "photo_variants": blogs.photo_variants,
                 "description": blogs.description,
             })
 
@@ -376,57 +389,143 @@ async def bloge_list_profile(user_id: UUID,session: AsyncSession = Depends(get_s
         )
     
 
+async def load_feed_page(limit: int, cursor: Optional[str], session: AsyncSession) -> dict:
+    query = (
+        select(
+            BlogCreate.blog_uid,
+            BlogCreate.photo,
+            BlogCreate.photo_variants,
+            BlogCreate.description,
+            BlogCreate.user_id,
+            BlogCreate.like_count,
+            BlogCreate.dislike_count,
+            BlogCreate.comment_count,
+            BlogCreate.create_at,
+            usertable.username,
+            usertable.image,
+            usertable.image_variants
+        ).join(usertable, BlogCreate.user_id == usertable.user_id)
+        .where(BlogCreate.delete_status == False)
+    )
+
+    if cursor:
+        cursor_create_at, cursor_blog_uid = decode_cursor(cursor)
+        query = query.where(
+            tuple_(BlogCreate.create_at, BlogCreate.blog_uid)
+            < tuple_(cursor_create_at, cursor_blog_uid)
+        )
+
+    # One extra row tells us whether another page exists without a COUNT.
+    result = await session.execute(
+        query.order_by(BlogCreate.create_at.desc(), BlogCreate.blog_uid.desc())
+        .limit(limit + 1)
+    )
+
+    blog_data = result.all()
+    has_more = len(blog_data) > limit
+    blog_data = blog_data[:limit]
+    blog_uids = [row.blog_uid for row in blog_data]
+
+    latest_comments = await user_service.latest_comments(
+        blog_uids, FEED_COMMENT_PREVIEW, session
+    )
+
+    bloges = []
+    for row in blog_data:
+        (
+            blog_uid,
+            photo,
+            photo_variants,
+            description,
+            author_id,
+            like_count,
+            dislike_count,
+            comment_count,
+            create_at,
+            username,
+            user_image,
+            user_image_variants
+        ) = row
+
+        bloges.append({
+            "blog_uid": str(blog_uid),
+            "photo": preferred_image(photo, photo_variants),
+            "photo_original": photo,
+            "photo_variants": photo_variants,
+            "description": description,
+            "user_id": str(author_id),
+            "username": username,
+            "user_image": preferred_image(user_image, user_image_variants),
+            "total_likes": like_count,
+            "total_dislikes": dislike_count,
+            "likes": [],
+            "dislikes": [],
+            "comment_count": comment_count,
+            "comments": jsonable_encoder(latest_comments.get(blog_uid, []))
+        })
+
+    next_cursor = None
+    if has_more:
+        last = blog_data[-1]
+        next_cursor = encode_cursor(last.create_at, last.blog_uid)
+
+    content = {"bloges": bloges, "next_cursor": next_cursor}
+    return {
+        "blog_uids": blog_uids,
+        "author_ids": list({row.user_id for row in blog_data}),
+        "content": content,
+        # Rendered once so cache hits for anonymous viewers skip serialization.
+        "body": JSONResponse(content=content).body
+    }
+
+
 @auth_router.get("/bloge_list", response_model=dict)
-async def bloge_list(session: AsyncSession = Depends(get_session)):
+async def bloge_list(
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    user_id: Optional[UUID] = Query(None),
+    session: AsyncSession = Depends(get_session)
+):
     try:
+        cache_key = (cursor, limit)
+        page, generation = feed_cache.get(cache_key)
+        if page is None:
+            # Only the leader of a burst touches its session; followers share its result.
+            # The generation is part of the key so a request that missed after an
+            # invalidation never joins (and then caches) a read started before it.
+            page = await read_flight.do(
+                ("bloge_list", generation, cursor, limit),
+                lambda: load_feed_page(limit, cursor, session)
+            )
+            feed_cache.set(cache_key, page, page["blog_uids"], generation, page["author_ids"])
 
-        result = await session.execute(
-            select(
-                BlogCreate.blog_uid,
-                BlogCreate.photo,
-                BlogCreate.comments,       
-                BlogCreate.description,
-                BlogCreate.user_id,
-                BlogCreate.likes,
-                BlogCreate.dislikes,
-                usertable.username,
-                usertable.image
-            ).join(usertable, BlogCreate.user_id == usertable.user_id)
-            .where(BlogCreate.delete_status == False)
-        )
+        if not user_id or not page["blog_uids"]:
+            return Response(status_code=200, content=page["body"], media_type="application/json")
 
-        blog_data = result.all()
+        # likes/dislikes only carry the viewer's own reaction, which is all the
+        # client needs to highlight its buttons.
+        reaction_result = await session.execute(
+            select(BlogReaction.blog_uid, BlogReaction.kind).where(
+                BlogReaction.user_id == user_id,
+                BlogReaction.blog_uid.in_(page["blog_uids"])
+            )
+        )
+        viewer_reactions = {str(blog_uid): kind for blog_uid, kind in reaction_result.all()}
 
         bloges = []
-        for row in blog_data:
-            (
-                blog_uid,
-                photo,
-                comments,
-                description,
-                user_id,
-                likes,
-                dislikes,
-                username,
-                user_image
-            ) = row
-
-            bloges.append({
-                "blog_uid": str(blog_uid),
-                "photo": photo,
-                "description": description,
-                "user_id": str(user_id),
-                "username": username,
-                "user_image": user_image,
-                "total_likes": len(likes) if likes else 0,
-                "total_dislikes": len(dislikes) if dislikes else 0,
-                "likes": [str(uid) for uid in likes] if likes else [],
-                "dislikes": [str(uid) for uid in dislikes] if dislikes else [],
-                "comments": comments if comments else []
-            })
+        for blog in page["content"]["bloges"]:
+            kind = viewer_reactions.get(blog["blog_uid"])
+            if kind is not None:
+                blog = {**blog, f"{kind}s": [str(user_id)]}
+            bloges.append(blog)
 
-        return JSONResponse(status_code=200, content={"bloges": bloges})
+        return JSONResponse(
+            status_code=200,
+            content={"bloges": bloges, "next_cursor": page["content"]["next_cursor"]}
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -441,38 +540,21 @@ async def like_blog(
     session: AsyncSession = Depends(get_session)
 ):
     try:
-        result = await session.execute(
-            select(BlogCreate).where(BlogCreate.blog_uid == blog_uid)
-        )
-        blog_row = result.first()
-        if not blog_row:
-            raise HTTPException(status_code=404, detail="Blog not found")
-
-        blog: BlogCreate = blog_row[0]
+        reacted = await user_service.react_to_blog(blog_uid, user_id, "like", session)
 
-        if user_id in blog.likes:
+        if not reacted:
             return JSONResponse(
                 status_code=200,
                 content={"message": "User already liked this blog"}
             )
-        likes = blog.likes.copy()
-        likes.append(user_id)
-        blog.likes = likes
-
-        if user_id in blog.dislikes:
-            dislikes = blog.dislikes.copy()
-            dislikes.remove(user_id)
-            blog.dislikes = dislikes
-
-        session.add(blog)
-        await session.commit()
-        await session.refresh(blog)
 
         return JSONResponse(
             status_code=201,
             content={"message": "Blog liked successfully"}
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -484,38 +566,21 @@ async def dislike_blog(
     session: AsyncSession = Depends(get_session)
 ):
     try:
-        result = await session.execute(
-            select(BlogCreate).where(BlogCreate.blog_uid == blog_uid)
-        )
-        blog_row = result.first()
-        if not blog_row:
-            raise HTTPException(status_code=404, detail="Blog not found")
-
-        blog: BlogCreate = blog_row[0]
+        reacted = await user_service.react_to_blog(blog_uid, user_id, "dislike", session)
 
-        if user_id in blog.dislikes:
+        if not reacted:
             return JSONResponse(
                 status_code=200,
                 content={"message": "User already disliked this blog"}
             )
 
-        dislikes = blog.dislikes.copy()
-        dislikes.append(user_id)
-        blog.dislikes = dislikes
-
-        if user_id in blog.likes:
-            likes = blog.likes.copy()
-            likes.remove(user_id)
-            blog.likes = likes
-
-        await session.commit()
-        await session.refresh(blog)
-
         return JSONResponse(
             status_code=201,
             content={"message": "Blog disliked successfully"}
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
@@ -534,46 +599,66 @@ async def add_comment(
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
 
-        blog_result = await session.execute(select(BlogCreate).where(BlogCreate.blog_uid == blog_uid))
-        blog_row = blog_result.first()
-        if not blog_row:
-            raise HTTPException(status_code=404, detail="Blog not found")
+        await user_service.add_comment(blog_uid, user, comment_data.comments, session)
+
+        return JSONResponse(
+            status_code=201,
+            content={"message": "Comment added successfully"}
+        )
 
-        ist = pytz.timezone("Asia/Kolkata")
-        utc_time = datetime.utcnow().replace(tzinfo=pytz.utc)
-        local_time = utc_time.astimezone(ist)
-        local_time_naive = local_time.replace(tzinfo=None)
+    except HTTPException:
+        raise
+    except Exception as e:
+        tb = traceback.format_exc()
+        logger.error(f"Error in add_comment: {str(e)}\n{tb}")
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
-        blog: BlogCreate = blog_row[0]
 
-        new_comment = Comment(
-            comment_uid=uuid.uuid4(),
-            user_id=user_id,
-            username=user.username,
-            user_photo=user.image,
-            comment=comment_data.comments,
-            timestamp=local_time_naive
-        )
+@auth_router.get("/comments/{blog_uid}", response_model=dict)
+async def comment_list(
+    blog_uid: UUID,
+    limit: int = Query(COMMENT_PAGE_SIZE, ge=1, le=COMMENT_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    session: AsyncSession = Depends(get_session)
+):
+    try:
+        query = select(Comment).where(Comment.blog_uid == blog_uid)
 
-        new_comment_dict = jsonable_encoder(new_comment)
+        if cursor:
+            cursor_timestamp, cursor_comment_uid = decode_cursor(cursor)
+            query = query.where(
+                tuple_(Comment.timestamp, Comment.comment_uid)
+                < tuple_(cursor_timestamp, cursor_comment_uid)
+            )
 
-        comments = blog.comments.copy()
-        comments.append(new_comment_dict)
-        blog.comments = comments
+        result = await session.execute(
+            query.order_by(Comment.timestamp.desc(), Comment.comment_uid.desc())
+            .limit(limit + 1)
+        )
+        comment_rows = result.scalars().all()
+        has_more = len(comment_rows) > limit
+        comment_rows = comment_rows[:limit]
 
-        session.add(blog)
-        await session.commit()
-        await session.refresh(blog)
+        next_cursor = None
+        if has_more:
+            last = comment_rows[-1]
+            next_cursor = encode_cursor(last.timestamp, last.comment_uid)
 
         return JSONResponse(
-            status_code=201,
-            content={"message": "Comment added successfully"}
+            status_code=200,
+            content={
+                "comments": jsonable_encoder(comment_rows),
+                "next_cursor": next_cursor
+            }
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
-        tb_str = traceback.format_exc()
-        print("Exception traceback:", tb_str)
-        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while fetching comments: {str(e)}"
+        )
 
 
 @auth_router.get("/user_profile/{userId}", response_model=list[dict])
@@ -588,6 +673,7 @@ async def user_profile(userId: UUID, session: AsyncSession = Depends(get_session
         "username": user.username,
         "email": user.email,
         "image": user.image,
+        "image_variants": user.image_variants,
     }
     return JSONResponse(status_code=200, content={"user": user_data})
 
@@ -598,6 +684,7 @@ async def update_profile(userId: UUID,
                          email: EmailStr = Form(...),
                          image_url: Optional[str] = Form(None),
                          image: Optional[UploadFile] = File(None),
+                         image_key: Optional[str] = Form(None),
                          session: AsyncSession = Depends(get_session)):
 
     is_username = await user_validation.validate_text(username, session)
@@ -626,24 +713,30 @@ async def update_profile(userId: UUID,
         email=email,
     )
 
-    update_user = await user_service.profile_update(user_data, userId, image, session)
+    update_user = await user_service.profile_update(user_data, userId, image, session, image_key)
 
     return JSONResponse(status_code=200, content={"message": "Profile updated successfully"})
 
 
+async def load_blog_details(BlogeID: UUID, session: AsyncSession):
+    result = await session.execute(
+        select(
+            BlogCreate.blog_uid,
+            BlogCreate.photo,
+            BlogCreate.description,
+        ).where(BlogCreate.blog_uid == BlogeID)
+    )
+    return result.first()
+
+
 @auth_router.get("/fetch_blog_details_for_editing/{BlogeID}", response_model=dict)
 async def fetch_blog_details_for_editing(BlogeID: UUID, session: AsyncSession = Depends(get_session)):
     try:
-        result = await session.execute(
-            select(
-                BlogCreate.blog_uid,
-                BlogCreate.photo,
-                BlogCreate.description,
-            ).where(BlogCreate.blog_uid == BlogeID)
+        blog_data = await read_flight.do(
+            ("blog_details", BlogeID),
+            lambda: load_blog_details(BlogeID, session)
         )
 
-        blog_data = result.first()
-
         if not blog_data:
             raise HTTPException(status_code=404, detail="Blog not found")
 
@@ -657,6 +750,8 @@ async def fetch_blog_details_for_editing(BlogeID: UUID, session: AsyncSession =
 
         return JSONResponse(status_code=200, content={"bloges": bloges})
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -670,6 +765,7 @@ async def Bloge_updation(
     description: str = Form(...),
     image_url: Optional[str] = Form(None),
     image: Optional[UploadFile] = File(None),
+    image_key: Optional[str] = Form(None),
     session: AsyncSession = Depends(get_session),
 ):
     is_description = await user_validation.description(description, session)
@@ -697,6 +793,6 @@ async def Bloge_updation(
         description = description
     )
 
-    created_blog = await user_service.bloge_updation(BlogeID, blog_update_data, image, session)
+    created_blog = await user_service.bloge_updation(BlogeID, blog_update_data, image, session, image_key)
 
     return JSONResponse(status_code=200, content={"message": "Blog updated successfully"})
@@ -37,4 +37,10 @@ class commentRequest(BaseModel):
 
 class ProfileCreateRequest(BaseModel):
     username: str
-    email: str
\ No newline at end of file
+    email: str
+
+
+class UploadUrlRequest(BaseModel):
+    content_type: str
+    size: int
+    sha256: str
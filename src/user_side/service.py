@@ -2,40 +2,30 @@ from src.db.models import *
 from .schemas import *
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from sqlalchemy import update, func
+from sqlalchemy.orm import aliased
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
-from src.utils import generate_passwd_hash, UPLOAD_DIR, random_code
-from fastapi import UploadFile, File, HTTPException, status, WebSocket, WebSocketDisconnect
+from src.utils import password_hasher, UPLOAD_DIR, random_code
+from src.cache import feed_cache
+from src.usernames import username_index
+from src.accounts import raise_unique_violation
+from src.upload import upload_media, direct_uploads
+from src.images import image_derivatives, preferred_image
+from fastapi import UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect
 import logging
 from uuid import UUID
 import traceback
 from dotenv import load_dotenv
-import os
-import boto3
 import pytz
 import hmac
 import hashlib
 from fastapi import Query
 import re
 from typing import Optional
-from botocore.exceptions import ClientError
-import mimetypes
-import asyncio
-from fastapi_mail import MessageSchema
 
 load_dotenv()
 
-BUCKET_NAME = os.getenv('S3_BUCKET_NAME')
-AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
-AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
-AWS_REGION = os.getenv('AWS_REGION')
-
-s3_client = boto3.client(
-    's3',
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-    region_name=AWS_REGION
-)
-
 
 class Validation:
     async def validate_text(self, text: str, session: AsyncSession) -> bool:
@@ -129,62 +119,140 @@ class UserService:
             create_at=create_at,
             update_at=update_at
         )
-        new_user.password = generate_passwd_hash(user_data_dict['password'])
+        new_user.password = await password_hasher.hash(user_data_dict['password'])
 
         session.add(new_user)
-        await session.commit()
-        await session.refresh(new_user)
+        try:
+            await session.commit()
+        except IntegrityError as e:
+            # A concurrent signup took the email or username after the
+            # pre-check; the unique indexes make the insert fail instead.
+            await session.rollback()
+            raise_unique_violation(e)
 
+        username_index.add(new_user.username)
         return new_user
 
-    async def upload_to_s3_bucket(self, file: UploadFile, folder_name: str) -> str:
-        try:
-            file_path = f"{folder_name}/{file.filename}"
-            content_type, _ = mimetypes.guess_type(file.filename)
-            content_type = content_type or "application/octet-stream"
-
-            def upload():
-                s3_client.put_object(
-                    Bucket=BUCKET_NAME,
-                    Key=file_path,
-                    Body=file.file,
-                    ContentType=content_type
-                )
-
-            await asyncio.to_thread(upload)
-            file_url = f"https://{BUCKET_NAME}.s3.amazonaws.com/{file_path}"
-            return file_url
-
-        except ClientError as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to upload file '{file.filename}' to S3: {e.response['Error']['Message']}"
+    async def react_to_blog(self, blog_uid: UUID, user_id: UUID, kind: str, session: AsyncSession) -> bool:
+        """Record a like/dislike. Returns False if the user already has that reaction."""
+        result = await session.execute(
+            select(BlogReaction)
+            .where(BlogReaction.blog_uid == blog_uid, BlogReaction.user_id == user_id)
+            .with_for_update()
+        )
+        reaction = result.scalars().first()
+
+        if reaction is not None and reaction.kind == kind:
+            return False
+
+        like_delta = (kind == "like") - (reaction is not None and reaction.kind == "like")
+        dislike_delta = (kind == "dislike") - (reaction is not None and reaction.kind == "dislike")
+
+        # Counters are bumped in place so concurrent reactions never overwrite each other.
+        counters = await session.execute(
+            update(BlogCreate)
+            .where(BlogCreate.blog_uid == blog_uid)
+            .values(
+                like_count=BlogCreate.like_count + like_delta,
+                dislike_count=BlogCreate.dislike_count + dislike_delta
             )
+        )
+        if counters.rowcount == 0:
+            await session.rollback()
+            raise HTTPException(status_code=404, detail="Blog not found")
+
+        if reaction is None:
+            session.add(BlogReaction(blog_uid=blog_uid, user_id=user_id, kind=kind))
+        else:
+            reaction.kind = kind
 
-    async def delete_folder_contents(self, bucket_name, folder_name):
         try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            existing = await session.execute(
+                select(BlogReaction.kind)
+                .where(BlogReaction.blog_uid == blog_uid, BlogReaction.user_id == user_id)
+            )
+            if existing.first() is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            # A concurrent request from the same user inserted the reaction first.
+            return False
+
+        feed_cache.invalidate_blog(blog_uid)
+        return True
 
-            response = s3_client.list_objects_v2(
-                Bucket=bucket_name, Prefix=folder_name)
+    async def add_comment(self, blog_uid: UUID, user: usertable, text: str, session: AsyncSession) -> Comment:
+        ist = pytz.timezone("Asia/Kolkata")
+        utc_time = datetime.utcnow().replace(tzinfo=pytz.utc)
+        local_time_naive = utc_time.astimezone(ist).replace(tzinfo=None)
 
-            if 'Contents' not in response:
-                return True
+        counters = await session.execute(
+            update(BlogCreate)
+            .where(BlogCreate.blog_uid == blog_uid)
+            .values(comment_count=BlogCreate.comment_count + 1)
+        )
+        if counters.rowcount == 0:
+            await session.rollback()
+            raise HTTPException(status_code=404, detail="Blog not found")
+
+        new_comment = Comment(
+            blog_uid=blog_uid,
+            user_id=user.user_id,
+            username=user.username,
+            user_photo=preferred_image(user.image, user.image_variants),
+            comment=text,
+            timestamp=local_time_naive
+        )
+        session.add(new_comment)
+        await session.commit()
+        feed_cache.invalidate_blog(blog_uid)
+
+        return new_comment
+
+    async def latest_comments(self, blog_uids: list, per_blog: int, session: AsyncSession) -> dict:
+        """Latest ``per_blog`` comments for each blog, oldest first, in one query."""
+        if not blog_uids:
+            return {}
+
+        ranked = (
+            select(
+                Comment,
+                func.row_number().over(
+                    partition_by=Comment.blog_uid,
+                    order_by=(Comment.timestamp.desc(), Comment.comment_uid.desc())
+                ).label("rank")
+            )
+            .where(Comment.blog_uid.in_(blog_uids))
+            .subquery()
+        )
+        ranked_comment = aliased(Comment, ranked)
 
-            file_keys = [{'Key': obj['Key']} for obj in response['Contents']]
+        result = await session.execute(
+            select(ranked_comment)
+            .where(ranked.c.rank <= per_blog)
+            .order_by(ranked.c.timestamp, ranked.c.comment_uid)
+        )
 
-            s3_client.delete_objects(Bucket=bucket_name, Delete={
-                                     'Objects': file_keys})
+        latest = {}
+        for comment in result.scalars().all():
+            latest.setdefault(comment.blog_uid, []).append(comment)
+        return latest
 
-            return True
-        except ClientError as e:
-            return False
+    async def resolve_media(self, file: Optional[UploadFile], key: Optional[str]) -> Optional[str]:
+        if file:
+            return await upload_media(file)
+        if key:
+            return await direct_uploads.confirm(key)
+        return None
 
     async def create_bloge(
         self,
         user_id: UUID,
         bloge_info: BlogecreateRequest,
         photo: Optional[UploadFile],
-        session: AsyncSession
+        session: AsyncSession,
+        photo_key: Optional[str] = None
     ):
         try:
             ist = pytz.timezone("Asia/Kolkata")
@@ -192,11 +260,7 @@ class UserService:
             local_time = utc_time.astimezone(ist)
             local_time_naive = local_time.replace(tzinfo=None)
 
-            timestamp_str = local_time.strftime("%Y-%m-%d_%H-%M-%S")
-
-            folder_name = f"User/bloge/{timestamp_str}"
-
-            photo_url = await self.upload_to_s3_bucket(photo, folder_name) if photo else None
+            photo_url = await self.resolve_media(photo, photo_key)
 
             new_bloge = BlogCreate(
                 photo=photo_url,
@@ -208,8 +272,14 @@ class UserService:
 
             session.add(new_bloge)
             await session.commit()
+            feed_cache.invalidate_first_pages()
+
+            if photo_url:
+                await image_derivatives.schedule_blog_photo(photo_url, new_bloge.blog_uid)
 
             return new_bloge
+        except HTTPException:
+            raise
         except Exception as e:
             await session.rollback()
             raise Exception(f"Error creating policy info: {str(e)}")
@@ -219,18 +289,11 @@ class UserService:
         BlogeID: UUID,
         Bloge_info: BlogecreateRequest,
         photo: Optional[UploadFile],
-        session: AsyncSession
+        session: AsyncSession,
+        photo_key: Optional[str] = None
     ):
         try:
-            ist = pytz.timezone("Asia/Kolkata")
-            utc_time = datetime.utcnow().replace(tzinfo=pytz.utc)
-            local_time = utc_time.astimezone(ist)
-            timestamp_str = local_time.strftime("%Y-%m-%d_%H-%M-%S")
-
-            photo_url = None
-            if photo:
-                folder_name = f"User/bloge/{timestamp_str}"
-                photo_url = await self.upload_to_s3_bucket(photo, folder_name)
+            photo_url = await self.resolve_media(photo, photo_key)
 
             result = await session.execute(select(BlogCreate).where(BlogCreate.blog_uid == BlogeID))
             blog_record = result.scalars().first()
@@ -258,8 +321,13 @@ class UserService:
 
             if photo_url:
                 blog_record.photo = photo_url
+                blog_record.photo_variants = None
 
             await session.commit()
+            feed_cache.invalidate_blog(BlogeID)
+
+            if photo_url:
+                await image_derivatives.schedule_blog_photo(photo_url, BlogeID)
 
             return {"message": "Blog updated successfully"}
 
@@ -275,13 +343,11 @@ class UserService:
         user_data: ProfileCreateRequest,
         user_Id: UUID,
         image: Optional[UploadFile],
-        session: AsyncSession
+        session: AsyncSession,
+        image_key: Optional[str] = None
     ):
         try:
-            file_url = None
-            if image:
-                folder_name = f"User/profile_images/{user_data.username}"
-                file_url = await self.upload_to_s3_bucket(image, folder_name) if image else None
+            file_url = await self.resolve_media(image, image_key)
 
             result = await session.execute(
                 select(usertable).where(usertable.user_id == user_Id)
@@ -311,12 +377,24 @@ class UserService:
 
             if file_url:
                 user.image = file_url
+                user.image_variants = None
 
             session.add(user)
-            await session.commit()
+            try:
+                await session.commit()
+            except IntegrityError as e:
+                await session.rollback()
+                raise_unique_violation(e)
+            username_index.add(user.username)
+            feed_cache.invalidate_author(user.user_id)
+
+            if file_url:
+                await image_derivatives.schedule_profile_image(file_url, user_Id)
 
             return {"message": "Profile updated successfully"}
 
+        except HTTPException:
+            raise
         except Exception as e:
             await session.rollback()
             raise HTTPException(
@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from sqlalchemy import func
+from sqlmodel import select
+from src.config import Config
+from src.db.models import usertable
+
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter. ``in`` is never wrong when it says no; when it
+    says yes the value was added, or with probability about ``error_rate``
+    it is a false positive.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        # Double hashing: k positions from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class UsernameIndex:
+    """
+    Answers "is this username taken?" without a query for most names. A
+    Bloom filter of lowercased usernames is built from usertable in the
+    background at startup and rebuilt every ``rebuild_interval`` seconds;
+    ``add`` keeps it current for names created or changed in this worker.
+    A name the filter has never seen is free; anything else, and every
+    check before the first build finishes, goes to the database.
+
+    Other workers' new names only show up after the next rebuild, so a
+    "free" answer is advisory. The unique index on lower(username) still
+    decides at signup.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, rebuild_interval: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_interval = rebuild_interval
+        self.checks = 0
+        self.filtered = 0
+        self.database_checks = 0
+        self.false_positives = 0
+        self.rebuilds = 0
+        self.last_rebuild_seconds = 0.0
+        self._filter = None
+        self._added_during_rebuild = None
+        self._task = None
+
+    def add(self, username: str):
+        username = username.lower()
+        if self._filter is not None:
+            self._filter.add(username)
+        if self._added_during_rebuild is not None:
+            self._added_during_rebuild.append(username)
+
+    async def is_available(self, username: str, session) -> bool:
+        username = username.lower()
+        self.checks += 1
+        if self._filter is not None and username not in self._filter:
+            self.filtered += 1
+            return True
+
+        self.database_checks += 1
+        result = await session.execute(
+            select(usertable.user_id).where(func.lower(usertable.username) == username).limit(1)
+        )
+        taken = result.first() is not None
+        if not taken and self._filter is not None:
+            self.false_positives += 1
+        return not taken
+
+    async def rebuild(self, session_factory):
+        started = time.perf_counter()
+        # Names added while the table is being read may be missing from the
+        # snapshot, so they are replayed into the new filter before the swap.
+        self._added_during_rebuild = []
+        try:
+            async with session_factory() as session:
+                total = await session.scalar(select(func.count()).select_from(usertable))
+                bloom = BloomFilter(max(self.capacity, total * 2), self.error_rate)
+                result = await session.stream_scalars(
+                    select(usertable.username).execution_options(yield_per=5000)
+                )
+                async for username in result:
+                    bloom.add(username.lower())
+            for username in self._added_during_rebuild:
+                bloom.add(username)
+            self._filter = bloom
+        finally:
+            self._added_during_rebuild = None
+        self.rebuilds += 1
+        self.last_rebuild_seconds = time.perf_counter() - started
+
+    async def _run(self, session_factory):
+        while True:
+            try:
+                await self.rebuild(session_factory)
+            except Exception as e:
+                logger.error(f"Failed to rebuild the username index: {e}")
+            await asyncio.sleep(self.rebuild_interval)
+
+    def start(self, session_factory):
+        self._task = asyncio.create_task(self._run(session_factory))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        bloom = self._filter
+        return {
+            "ready": bloom is not None,
+            "names": bloom.count if bloom else 0,
+            "bits": bloom.size if bloom else 0,
+            "hashes": bloom.hashes if bloom else 0,
+            "checks": self.checks,
+            "filtered": self.filtered,
+            "database_checks": self.database_checks,
+            "false_positives": self.false_positives,
+            "rebuilds": self.rebuilds,
+            "last_rebuild_seconds": round(self.last_rebuild_seconds, 3),
+        }
+
+
+username_index = UsernameIndex(
+    capacity=Config.USERNAME_INDEX_CAPACITY,
+    error_rate=Config.USERNAME_INDEX_ERROR_RATE,
+    rebuild_interval=Config.USERNAME_INDEX_REBUILD_SECONDS
+)
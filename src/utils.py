@@ -2,6 +2,7 @@ from passlib.context import CryptContext
 from datetime import timedelta, datetime
 import jwt
 from src.config import Config
+from src.cache import token_cache
 import uuid
 import logging
 from pathlib import Path
@@ -12,10 +13,18 @@ import pytz
 import jwt
 import logging
 from jwt.exceptions import ExpiredSignatureError, DecodeError, InvalidTokenError
-from fastapi_mail import MessageSchema
+from email.message import EmailMessage
+import base64
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
+# min == max rounds makes any stored hash with a different cost "need update",
+# so logins transparently rehash after BCRYPT_ROUNDS changes.
 password_context = CryptContext(
-    schemes=['bcrypt']
+    schemes=['bcrypt'],
+    bcrypt__default_rounds=Config.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=Config.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=Config.BCRYPT_ROUNDS
 )
 
 
@@ -28,11 +37,59 @@ def verify_password(password, hash):
     return password_context.verify(password, hash)
 
 
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated thread pool (bcrypt releases the GIL) so a
+    login storm cannot stall the event loop. Once ``max_pending`` calls are
+    queued, new ones fail fast with 503 instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly.",
+                headers={"Retry-After": "1"}
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(password_context.hash, password)
+
+    async def verify_and_update(self, password: str, hash: str):
+        """Returns (valid, new_hash); new_hash is set when the stored cost is outdated."""
+        if not hash:
+            return False, None
+        return await self._run(password_context.verify_and_update, password, hash)
+
+
+password_hasher = PasswordHasher(
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING
+)
+
+
 ACCESS_TOKEN_EXPIRY = 60
 
 ist = pytz.timezone("Asia/Kolkata")
 
 
+def ist_now() -> datetime:
+    utc_time = datetime.utcnow().replace(tzinfo=pytz.utc)
+    return utc_time.astimezone(ist).replace(tzinfo=None)
+
+
 def create_access_token(user_data: dict, expiry: timedelta = None, refresh: bool = False):
 
     utc_time = datetime.utcnow().replace(tzinfo=pytz.utc)
@@ -59,44 +116,66 @@ def create_access_token(user_data: dict, expiry: timedelta = None, refresh: bool
     return token
 
 
-def generate_verification_email(email: str, code: str) -> MessageSchema:
-    return MessageSchema(
-        subject="Email Verification Code",
-        recipients=[email],
-        body=(
-            f"Hello,\n\n"
-            f"Thank you for registering with us!\n\n"
-            f"To verify your email address, please use the following One-Time Password (OTP):\n\n"
-            f"OTP: {code}\n\n"
-            f"This code is valid for the next 2 minutes.\n\n"
-            f"If you did not request this, please ignore this email.\n\n"
-            f"Best regards,\n"
-            f"Your Team"
-        ),
-        subtype="plain"
+def generate_verification_email(email: str, code: str) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = "Email Verification Code"
+    message["To"] = email
+    message.set_content(
+        f"Hello,\n\n"
+        f"Thank you for registering with us!\n\n"
+        f"To verify your email address, please use the following One-Time Password (OTP):\n\n"
+        f"OTP: {code}\n\n"
+        f"This code is valid for the next {Config.OTP_TTL_SECONDS // 60 or 1} minute(s).\n\n"
+        f"If you did not request this, please ignore this email.\n\n"
+        f"Best regards,\n"
+        f"Your Team"
     )
+    return message
 
 
 def decode_token(token: str):
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
+
     try:
         token_data = jwt.decode(
             token,
             key=Config.JWT_SECRET,
             algorithms=[Config.JWT_ALOGRITHM]
         )
-        return token_data
     except ExpiredSignatureError:
-        logging.exception("Token has expired.")
+        logging.info("Token has expired.")
         return None
     except (DecodeError, InvalidTokenError) as e:
-        logging.exception(f"Invalid token: {e}")
+        logging.warning(f"Invalid token: {e}")
         return None
 
+    token_cache.set(token, token_data)
+    return token_data
 
-UPLOAD_DIR = Path(
-    "D:/BROTOTYPE BOX/TASK/Week 23 1.0/Project 5.0/frontend/src/assets/uploads")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+UPLOAD_DIR = Path(Config.UPLOAD_DIR)
 
 
 def random_code():
     return random.randint(100000, 999999)
+
+
+
+def encode_cursor(timestamp: datetime, uid) -> str:
+    raw = f"{timestamp.isoformat()}|{uid}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        timestamp, uid = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), uuid.UUID(uid)
+    except (ValueError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )